@@ -0,0 +1,94 @@
+"""
+图片匹配性能测试脚本
+在合成截图上对比 numpy 匹配引擎与 pyautogui 原实现的耗时和结果
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from config import (
+    PLAY_BUTTON_IMAGE,
+    PLAYING_NOW_BUTTON_IMAGE,
+    BATTLE_NET_OPTION_IMAGE,
+    BATTLE_NET_LOGIN_IMAGE,
+    NETEASE_SUBMIT_IMAGE,
+    IMAGE_SEARCH_CONFIDENCE,
+)
+from template_matcher import TemplateImage, get_match_engine
+
+BENCHMARK_TEMPLATES = [
+    PLAY_BUTTON_IMAGE,
+    PLAYING_NOW_BUTTON_IMAGE,
+    BATTLE_NET_OPTION_IMAGE,
+    BATTLE_NET_LOGIN_IMAGE,
+    NETEASE_SUBMIT_IMAGE,
+]
+
+
+def make_synthetic_screenshot(template_path, width, height, seed=0):
+    """生成带噪声背景的RGB截图，并把模板贴到随机位置"""
+    rng = np.random.default_rng(seed)
+    # 平滑渐变叠加噪声，近似真实桌面的低频背景
+    gradient = np.linspace(0, 160, width)[None, :] + np.linspace(0, 60, height)[:, None]
+    noise = rng.normal(0, 20, (height, width))
+    gray = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+    screenshot = Image.fromarray(gray).convert("RGB")
+
+    with Image.open(template_path) as template:
+        template = template.convert("RGB")
+        left = int(rng.integers(0, width - template.width))
+        top = int(rng.integers(0, height - template.height))
+        screenshot.paste(template, (left, top))
+    return screenshot, (left, top)
+
+
+def _time_engine(engine, template, screenshot, repeat):
+    """返回多次匹配中的最短耗时（秒）以及匹配结果"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = engine.locate(template, screenshot, IMAGE_SEARCH_CONFIDENCE)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(width, height, repeat):
+    """对每个模板分别测试所有可用的匹配引擎"""
+    engines = [
+        ("numpy-auto", get_match_engine("numpy", "auto")),
+        ("numpy-fft", get_match_engine("numpy", "fft")),
+        ("pyramid-4", get_match_engine("numpy", "auto", 4)),
+        ("pyramid-8", get_match_engine("numpy", "auto", 8)),
+        ("pyautogui", get_match_engine("pyautogui")),
+    ]
+
+    for path in BENCHMARK_TEMPLATES:
+        screenshot, expected = make_synthetic_screenshot(path, width, height)
+        template = TemplateImage.load(path)
+        print(f"{path} ({template.width}x{template.height}) 期望位置: {expected}")
+        for name, engine in engines:
+            try:
+                elapsed, result = _time_engine(engine, template, screenshot, repeat)
+            except Exception as e:
+                print(f"  {name:<12} 不可用: {e}")
+                continue
+            location = (result.left, result.top) if result else None
+            status = "OK" if location == expected else "MISS"
+            print(f"  {name:<12} {elapsed * 1000:8.1f} ms  {location}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片匹配引擎性能测试")
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.width, args.height, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
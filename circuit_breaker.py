@@ -0,0 +1,134 @@
+"""
+重启退避与熔断模块
+连续恢复失败时按指数退避（带随机抖动和上限）推迟下一次尝试，
+失败次数达到阈值后熔断，冷却结束后只放行一次试探恢复
+"""
+
+import random
+import threading
+import time
+
+from config import (
+    RESTART_BACKOFF_BASE,
+    RESTART_BACKOFF_FACTOR,
+    RESTART_BACKOFF_MAX,
+    RESTART_BACKOFF_JITTER,
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_TIMEOUT,
+)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class BackoffPolicy:
+    """指数退避策略"""
+
+    def __init__(
+        self,
+        base=RESTART_BACKOFF_BASE,
+        factor=RESTART_BACKOFF_FACTOR,
+        cap=RESTART_BACKOFF_MAX,
+        jitter=RESTART_BACKOFF_JITTER,
+    ):
+        """
+        参数:
+            base: 第一次失败后的等待时间（秒）
+            factor: 每多失败一次等待时间的倍数
+            cap: 等待时间上限（秒）
+            jitter: 随机抖动比例（如0.2表示±20%）
+        """
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+
+    def delay(self, failures):
+        """连续失败 failures 次后，下一次尝试前的等待时间（秒）"""
+        if failures <= 0:
+            return 0.0
+        delay = min(self.base * self.factor ** (failures - 1), self.cap)
+        if self.jitter:
+            spread = delay * self.jitter
+            delay += random.uniform(-spread, spread)
+        return max(delay, 0.0)
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断，冷却后进入半开状态放行一次试探"""
+
+    def __init__(
+        self,
+        failure_threshold=CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT,
+    ):
+        """
+        参数:
+            failure_threshold: 熔断前允许的连续失败次数
+            reset_timeout: 熔断后的冷却时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return STATE_HALF_OPEN
+        return STATE_OPEN
+
+    def retry_in(self):
+        """熔断状态下距离允许试探的剩余秒数，其他状态返回0"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def allow_attempt(self):
+        """
+        是否允许进行一次恢复尝试
+
+        半开状态下同一时间只放行一次试探
+        """
+        with self._lock:
+            state = self._state()
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """
+        记录一次失败
+
+        返回:
+            bool: 本次失败导致熔断（或试探失败重新熔断）返回True
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            probing, self._probing = self._probing, False
+            if probing or (
+                self._opened_at is None
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                return True
+            return False
@@ -4,6 +4,7 @@
 """
 
 import os
+import sys
 
 # 应用程序配置
 APP_NAME = "Diablo III 自动启动器"
@@ -17,7 +18,8 @@ BATTLE_NET_EXE_PATH = r"C:\Program Files (x86)\Battle.net\Battle.net.exe"
 # ROS-BOT
 ROS_BOT_PROCESS_NAME = "v1BSlRxgGd3cMhoZ1XsXjC4.exe"
 ROS_BOT_EXE_PATH = r"C:\Users\kang_\Downloads\111\Ros-Bot\v1BSlRxgGd3cMhoZ1XsXjC4.exe"  # 请根据实际安装路径修改
-ROS_BOT_START_DELAY = 15  # 秒
+ROS_BOT_READY_TIMEOUT = 60  # 启动后等待ROS-BOT就绪的最长时间（秒）
+D3_READY_TIMEOUT = 90  # 点击Play后等待Diablo III进程出现的最长时间（秒）
 
 # 图片文件配置
 PLAY_BUTTON_IMAGE = "play.png"
@@ -25,21 +27,99 @@ PLAYING_NOW_BUTTON_IMAGE = "playingNow.png"
 BATTLE_NET_OPTION_IMAGE = "battle.net_option.png"
 BATTLE_NET_LOGIN_IMAGE = "battle.net_login.png"
 NETEASE_SUBMIT_IMAGE = "netease_submit.png"
+TEMPLATE_IMAGES = [
+    PLAY_BUTTON_IMAGE,
+    PLAYING_NOW_BUTTON_IMAGE,
+    BATTLE_NET_OPTION_IMAGE,
+    BATTLE_NET_LOGIN_IMAGE,
+    NETEASE_SUBMIT_IMAGE,
+]
 
 # 图片查找配置
 IMAGE_SEARCH_MAX_ATTEMPTS = 10
 IMAGE_SEARCH_CONFIDENCE = 0.8
 IMAGE_SEARCH_RETRY_DELAY = 0.5
+IMAGE_MATCH_ENGINE = "numpy"  # "numpy"（NCC匹配）或 "pyautogui"（原实现）
+IMAGE_MATCH_METHOD = "auto"  # numpy引擎计算方式: "auto"、"direct" 或 "fft"
+IMAGE_SEARCH_PYRAMID = True  # 是否启用由粗到细的金字塔搜索（仅numpy引擎）
+IMAGE_SEARCH_PYRAMID_FACTOR = 4  # 粗搜索缩放倍数，建议4或8
+IMAGE_SEARCH_PYRAMID_CANDIDATES = 5  # 进入全分辨率确认的候选数量
+POPUP_SEARCH_IDLE_ATTEMPTS = 2  # 批量查找弹窗时连续无发现的最大轮数
+IMAGE_SEARCH_REGION_MARGIN = 20  # 按窗口区域查找时向四周扩展的像素数
+IMAGE_HIT_MEMO_ENABLED = True  # 是否记忆按钮相对窗口的命中位置并优先校验
+FRAME_CHANGE_TILE_SIZE = 2  # 画面变化检测的降采样块边长（像素），块内取均值后逐像素比较
+FRAME_CHANGE_TOLERANCE = 0.5  # 降采样后任一像素的灰度变化超过该值才视为画面变化
+CAPTURE_BACKEND = (
+    "win32"  # 截图后端: "win32"（GDI零拷贝）、"pyautogui" 或 "fake"（黑屏，用于测试）
+)
+CAPTURE_STATS_INTERVAL = 600  # 记录截图缓冲区分配统计和进程内存的间隔（秒）
+SHARED_FRAME_MAX_AGE = 0.5  # 其他线程的截图在该时间（秒）内可直接复用
+POPUP_SENTINEL_ENABLED = True  # 是否在后台持续检测并关闭 Battle.net 弹窗
+POPUP_SENTINEL_INTERVAL = 0.5  # 弹窗检测间隔（秒）
+POPUP_SENTINEL_MAX_INTERVAL = 1.0  # Battle.net 窗口存在时，连续未发现弹窗后检测间隔的上限（秒），保证弹窗在1秒内被关闭
+POPUP_SENTINEL_IDLE_INTERVAL = (
+    4.0  # Battle.net 未运行、没有窗口或游戏在前台时的检测间隔（秒）
+)
+POPUP_SENTINEL_BROWSER_INTERVAL = (
+    2.0  # Battle.net 运行时在整个屏幕中查找浏览器网易确认弹窗的间隔（秒）
+)
+POPUP_SENTINEL_BACKOFF = 2  # 每次未发现弹窗后检测间隔的增长倍数
+POPUP_SENTINEL_FRESH_AGE = (
+    1.5  # 哨兵在此秒数内扫描过 Battle.net 窗口时，启动流程才跳过弹窗处理
+)
 
 # 监控配置
 MONITOR_CHECK_INTERVAL = 10  # 秒
 MONITOR_THREAD_CHECK_INTERVAL = 5  # 秒
+MONITOR_JITTER = 0.1  # 检查间隔的随机抖动比例，避免各服务的检查总在同一时刻执行
+SCHEDULER_WORKERS = 3  # 执行重启等耗时操作的工作线程数
+PROCESS_SNAPSHOT_MAX_AGE = 1.0  # 进程快照复用时间（秒），同一轮检查只扫描一次进程表
+WINDOW_INDEX_TTL = 0.5  # 窗口索引复用时间（秒），期间的窗口查找共享同一次枚举
+EXIT_WATCHER_ENABLED = (
+    True  # 是否阻塞等待进程退出并立即触发恢复（轮询作为兜底），所有进程共用一个等待线程
+)
+EXIT_WATCHER_WAIT_SLICE = (
+    1.0  # 每次等待的最长时间（秒）；无法阻塞等待时也是检查进程是否退出的间隔
+)
+RESTART_BACKOFF_BASE = 10  # 第一次恢复失败后的重试等待时间（秒）
+RESTART_BACKOFF_FACTOR = 2  # 每多失败一次等待时间的倍数
+RESTART_BACKOFF_MAX = 300  # 重试等待时间上限（秒）
+RESTART_BACKOFF_JITTER = 0.2  # 重试等待时间的随机抖动比例
+CIRCUIT_BREAKER_THRESHOLD = 5  # 连续恢复失败该次数后熔断
+CIRCUIT_BREAKER_RESET_TIMEOUT = 600  # 熔断后暂停恢复的时间（秒），之后试探恢复一次
+RESTART_STABLE_TIME = (
+    120  # 恢复后需连续健康运行的秒数，之后才重置失败计数（期间再次故障计为恢复失败）
+)
+HANG_DETECTION_ENABLED = True  # 是否检测进程卡死（窗口未响应或CPU/IO长时间无活动）
+HANG_SAMPLE_WINDOW = 18  # CPU/IO判定所需的连续采样数（每次检查采样一次）
+HANG_CPU_PERCENT = 0.5  # 采样间隔内CPU占用低于该百分比视为空闲
+HANG_IO_OPS = 0  # 采样间隔内IO次数不超过该值视为空闲
+HANG_NOT_RESPONDING_SAMPLES = 6  # 窗口连续未响应该次数后判定卡死
+
+# 资源泄漏监控配置
+RESOURCE_MONITOR_ENABLED = True  # 是否监控进程资源增长并计划重启
+RESOURCE_SAMPLE_INTERVAL = 60  # 资源采样间隔（秒）
+RESOURCE_SAMPLE_WINDOW = 120  # 每个进程保留的采样数（用于拟合增长趋势）
+RESOURCE_MIN_SAMPLES = 20  # 至少采样该次数后才判断趋势
+RESOURCE_PROJECTION_HORIZON = 1800  # 预计在该时间（秒）内超过上限即计划重启
+RESOURCE_LIMITS = {
+    D3_PROCESS_NAME: {"rss": 6 * 1024**3, "handles": 20000, "threads": 400},
+    ROS_BOT_PROCESS_NAME: {"rss": 2 * 1024**3, "handles": 10000, "threads": 200},
+    BATTLE_NET_PROCESS_NAME: {"rss": 2 * 1024**3, "handles": 10000},
+}  # rss单位为字节
+RECYCLE_MAINTENANCE_WINDOW = None  # 每日计划重启时间段，如 ("04:00", "04:30")
+RECYCLE_MIN_INTERVAL = 3600  # 两次计划重启的最短间隔（秒），应不小于维护时间段长度
+
+# 就绪探测配置
+READINESS_POLL_MIN_INTERVAL = 0.1  # 就绪探测的最短轮询间隔（秒）
+READINESS_POLL_MAX_INTERVAL = 1.0  # 就绪探测的最长轮询间隔（秒）
 
 # 窗口配置
 WINDOW_TITLE = f"{APP_NAME} - 管理窗口"
 WINDOW_SIZE = "600x500"
 LOG_DISPLAY_LINES = 50
 LOG_REFRESH_INTERVAL = 30  # 秒
+LOG_GUI_POLL_INTERVAL_MS = 200  # 管理窗口从内存日志队列取新日志的间隔（毫秒）
 
 # 日志配置
 LOG_DIR = "logs"
@@ -47,6 +127,15 @@ LOG_FILE_PREFIX = "diablo3_launcher"
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 LOG_RETENTION_DAYS = 7
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 单个日志文件的大小上限，超过后轮转为分段
+LOG_MAX_TOTAL_BYTES = 200 * 1024 * 1024  # 日志分段（压缩后）的总大小上限
+LOG_QUEUE_SIZE = 10000  # 日志队列容量，满时丢弃普通日志
+LOG_QUEUE_BLOCK_TIMEOUT = 0.5  # 队列满时 WARNING 及以上日志最多等待的秒数
+LOG_BATCH_SIZE = 100  # 累计多少条日志刷新一次文件
+LOG_FLUSH_INTERVAL = 1.0  # 有未刷新日志时最长等待的秒数
+EVENT_LOG_ENABLED = True  # 是否记录结构化事件（JSON Lines），用于统计恢复时间和启动耗时
+EVENT_LOG_FILE = os.path.join(LOG_DIR, "events.jsonl")
+EVENT_LOG_FSYNC_INTERVAL = 5.0  # 事件文件最多每隔多少秒 fsync 一次
 
 # PyAutoGUI配置
 PYAUTOGUI_FAILSAFE = True
@@ -55,10 +144,27 @@ PYAUTOGUI_PAUSE = 0.1
 # 窗口操作延迟
 WINDOW_OPERATION_DELAY = 0.2
 CLICK_DELAY = 0.5
-BATTLE_NET_START_DELAY = 5  # 秒
+BATTLE_NET_READY_TIMEOUT = 60  # 启动后等待Battle.net就绪的最长时间（秒）
 
 # 停止文件
 STOP_FILE = "stop_service.txt"
 
 # 获取项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 程序所在目录（打包版本为exe所在目录）
+APP_DIR = (
+    os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else PROJECT_ROOT
+)
+
+# 模板包（预解码的模板图片，启动时内存映射加载）
+TEMPLATE_BUNDLE_FILE = os.path.join(APP_DIR, "templates.bundle")
+
+# 按钮命中位置记录
+HIT_MEMO_FILE = os.path.join(APP_DIR, "hit_memo.json")
+
+# 已跟踪进程（PID与创建时间）的状态文件
+PROCESS_STATE_FILE = os.path.join(APP_DIR, "process_state.json")
+
+# 启动流程文件（步骤、探测、超时与重试），修改后下次启动即生效
+LAUNCH_WORKFLOW_FILE = os.path.join(APP_DIR, "launch_workflow.json")
@@ -0,0 +1,125 @@
+"""
+事件日志模块
+把检查结果、故障、恢复、启动步骤和点击等关键事件以 JSON Lines 追加到单独的文件，
+用于统计恢复时间（MTTR）和启动耗时；写入经队列由后台线程批量完成，并定期 fsync
+"""
+
+import json
+import logging
+import os
+import time
+
+from config import (
+    EVENT_LOG_ENABLED,
+    EVENT_LOG_FILE,
+    EVENT_LOG_FSYNC_INTERVAL,
+)
+from log_pipeline import LogPipeline
+from log_rotation import LogCompressor, RotatingLogHandler, prune_segments
+
+# 事件名称
+EVENT_CHECK = "check"
+EVENT_CRASH_DETECTED = "crash_detected"
+EVENT_SERVICE_RECOVERED = "service_recovered"
+EVENT_RESTART_STARTED = "restart_started"
+EVENT_RESTART_SUCCEEDED = "restart_succeeded"
+EVENT_RESTART_FAILED = "restart_failed"
+EVENT_LAUNCH_STEP = "launch_step"
+EVENT_LAUNCH_WORKFLOW = "launch_workflow"
+EVENT_CLICK = "click"
+EVENT_CAPTURE_STATS = "capture_stats"
+
+_event_logger = logging.getLogger("events")
+_event_logger.propagate = False
+_pipeline = None
+
+
+class JsonEventFormatter(logging.Formatter):
+    """每个事件一行 JSON：ts（Unix时间）、event 以及事件字段"""
+
+    def format(self, record):
+        event = {"ts": round(record.created, 3), "event": record.getMessage()}
+        event.update(getattr(record, "fields", None) or {})
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class EventFileHandler(RotatingLogHandler):
+    """只追加的事件文件，批量写入后最多每 fsync_interval 秒 fsync 一次"""
+
+    def __init__(
+        self, filename, fsync_interval=EVENT_LOG_FSYNC_INTERVAL, compressor=None
+    ):
+        super().__init__(filename, compressor=compressor)
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+
+    def _fsync(self):
+        if self.stream is not None:
+            os.fsync(self.stream.fileno())
+        self._last_fsync = time.monotonic()
+
+    def flush(self):
+        super().flush()
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            try:
+                self._fsync()
+            except OSError:
+                pass
+
+    def close(self):
+        try:
+            self.flush()
+            self._fsync()
+        except (OSError, ValueError):
+            pass
+        super().close()
+
+
+def setup_event_log(path=EVENT_LOG_FILE):
+    """
+    启动事件日志写入线程（未启用时不做任何事）
+
+    返回:
+        str: 事件文件路径，未启用时返回None
+    """
+    global _pipeline
+    if not EVENT_LOG_ENABLED:
+        return None
+    shutdown_event_log()
+
+    log_dir = os.path.dirname(path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    # 事件文件跨运行追加，只按大小轮转；过期分段在启动时清理
+    prune_segments(path)
+    handler = EventFileHandler(path, compressor=LogCompressor(path))
+    handler.setFormatter(JsonEventFormatter())
+
+    _pipeline = LogPipeline([handler])
+    _event_logger.setLevel(logging.INFO)
+    _event_logger.handlers.clear()
+    _event_logger.addHandler(_pipeline.queue_handler)
+    _pipeline.start()
+    return path
+
+
+def shutdown_event_log():
+    """写完队列中的事件并 fsync（程序退出时调用）"""
+    global _pipeline
+    pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        _event_logger.removeHandler(pipeline.queue_handler)
+        pipeline.stop()
+
+
+def record_event(event, **fields):
+    """
+    记录一个事件（只放入队列，不等待写入）
+
+    参数:
+        event: 事件名称（EVENT_* 常量）
+        **fields: 事件字段，需可序列化为JSON（无法序列化的值按字符串写入）
+    """
+    if _pipeline is None:
+        return
+    _event_logger.info(event, extra={"fields": fields})
@@ -0,0 +1,320 @@
+"""
+进程退出监视模块
+单个等待线程同时等待所有被监视进程的句柄（Windows 使用 WaitForMultipleObjects，
+Linux 使用 pidfd + poll），进程退出时立即触发回调，轮询只作为兜底
+"""
+
+import logging
+import os
+import select
+import threading
+
+import psutil
+
+from config import EXIT_WATCHER_WAIT_SLICE
+from process_snapshot import invalidate_snapshot
+
+logger = logging.getLogger()
+
+
+class _Win32Waiter:
+    """通过 WaitForMultipleObjects 同时等待多个进程句柄"""
+
+    SYNCHRONIZE = 0x00100000
+    WAIT_OBJECT_0 = 0
+    WAIT_TIMEOUT = 0x102
+    WAIT_FAILED = 0xFFFFFFFF
+    MAXIMUM_WAIT_OBJECTS = 64
+    ERROR_ACCESS_DENIED = 5
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._handle_type = wintypes.HANDLE
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        kernel32.WaitForMultipleObjects.argtypes = (
+            wintypes.DWORD,
+            ctypes.POINTER(wintypes.HANDLE),
+            wintypes.BOOL,
+            wintypes.DWORD,
+        )
+        kernel32.WaitForSingleObject.restype = wintypes.DWORD
+        kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+        kernel32.SetEvent.argtypes = (wintypes.HANDLE,)
+        kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+        self._kernel32 = kernel32
+        # 监视列表变化时用于唤醒等待
+        self._wake_event = kernel32.CreateEventW(None, False, False, None)
+        if not self._wake_event:
+            raise OSError(ctypes.get_last_error(), "CreateEventW 失败")
+
+    def open(self, pid):
+        handle = self._kernel32.OpenProcess(self.SYNCHRONIZE, False, pid)
+        if not handle:
+            if self._ctypes.get_last_error() == self.ERROR_ACCESS_DENIED:
+                raise psutil.AccessDenied(pid)
+            raise psutil.NoSuchProcess(pid)
+        return handle
+
+    def close(self, handle):
+        self._kernel32.CloseHandle(handle)
+
+    def wait(self, handles, timeout):
+        # 每次最多等待63个进程（另一个位置留给唤醒事件），超过时分组轮流等待
+        group_size = self.MAXIMUM_WAIT_OBJECTS - 1
+        groups = [
+            handles[i : i + group_size] for i in range(0, len(handles), group_size)
+        ] or [[]]
+        slice_ms = max(int(timeout * 1000 / len(groups)), 1)
+        for group in groups:
+            array = (self._handle_type * (len(group) + 1))(self._wake_event, *group)
+            result = self._kernel32.WaitForMultipleObjects(
+                len(group) + 1, array, False, slice_ms
+            )
+            if result == self.WAIT_TIMEOUT:
+                continue
+            if result == self.WAIT_FAILED:
+                raise OSError(
+                    self._ctypes.get_last_error(), "WaitForMultipleObjects 失败"
+                )
+            if result == self.WAIT_OBJECT_0:
+                return []
+            # 只返回序号最小的已退出进程，其余逐个确认
+            return [
+                handle
+                for handle in group
+                if self._kernel32.WaitForSingleObject(handle, 0) == self.WAIT_OBJECT_0
+            ]
+        return []
+
+    def wake(self):
+        self._kernel32.SetEvent(self._wake_event)
+
+
+class _PidfdWaiter:
+    """通过 pidfd + poll 同时等待多个进程（Linux 5.3+）"""
+
+    def __init__(self):
+        if not hasattr(os, "pidfd_open"):
+            raise OSError("当前系统不支持 pidfd")
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def open(self, pid):
+        try:
+            return os.pidfd_open(pid)
+        except ProcessLookupError:
+            raise psutil.NoSuchProcess(pid)
+        except PermissionError:
+            raise psutil.AccessDenied(pid)
+
+    def close(self, handle):
+        os.close(handle)
+
+    def wait(self, handles, timeout):
+        poller = select.poll()
+        poller.register(self._read_fd, select.POLLIN)
+        for handle in handles:
+            poller.register(handle, select.POLLIN)
+        ready = []
+        for fd, _ in poller.poll(timeout * 1000):
+            if fd == self._read_fd:
+                try:
+                    while os.read(self._read_fd, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+            else:
+                ready.append(fd)
+        return ready
+
+    def wake(self):
+        try:
+            os.write(self._write_fd, b"\0")
+        except BlockingIOError:
+            pass
+
+
+class _PollingWaiter:
+    """无法阻塞等待时，在同一线程中按等待间隔检查进程是否仍在运行"""
+
+    def __init__(self):
+        self._wake_event = threading.Event()
+
+    def open(self, pid):
+        return psutil.Process(pid)
+
+    def close(self, handle):
+        pass
+
+    def wait(self, handles, timeout):
+        self._wake_event.wait(timeout)
+        self._wake_event.clear()
+        return [process for process in handles if not process.is_running()]
+
+    def wake(self):
+        self._wake_event.set()
+
+
+def _create_waiter():
+    for waiter_class in (_Win32Waiter, _PidfdWaiter):
+        try:
+            return waiter_class()
+        except Exception:
+            continue
+    return _PollingWaiter()
+
+
+class _Watch:
+    """单个被监视的进程"""
+
+    def __init__(self, key, pid, callback, handle):
+        self.key = key
+        self.pid = pid
+        self.callback = callback
+        self.handle = handle
+
+
+class ExitWatcher:
+    """按名称监视进程退出，每个名称同时只监视一个PID；全部进程共用一个等待线程"""
+
+    def __init__(self, wait_slice=EXIT_WATCHER_WAIT_SLICE):
+        """
+        参数:
+            wait_slice: 每次等待的最长时间（秒），超时后重新读取监视列表
+        """
+        self._wait_slice = wait_slice
+        self._waiter = _create_waiter()
+        self._watches = {}
+        # 已经退出、等待回调的监视，以及待关闭的句柄（只在等待线程中关闭）
+        self._exited = []
+        self._to_close = []
+        self._thread = None
+        self._stopped = False
+        # 无权等待的进程 {key: pid}，避免每次检查都重复尝试
+        self._denied = {}
+        self._lock = threading.Lock()
+
+    def watch(self, key, pid, callback):
+        """
+        监视进程退出
+
+        参数:
+            key: 监视名称（通常为服务名）
+            pid: 进程PID
+            callback: 进程退出时在等待线程中调用 callback(key, pid)
+        """
+        with self._lock:
+            current = self._watches.get(key)
+            if current is not None and current.pid == pid:
+                return
+            if self._denied.get(key) == pid:
+                return
+            try:
+                handle = self._waiter.open(pid)
+            except psutil.NoSuchProcess:
+                handle = None
+            except psutil.AccessDenied as e:
+                self._denied[key] = pid
+                logger.warning(f"无法等待 {key} 进程 ({pid})，改为轮询: {e}")
+                return
+            if current is not None:
+                del self._watches[key]
+                self._to_close.append(current.handle)
+            watch = _Watch(key, pid, callback, handle)
+            if handle is None:
+                # 进程已经退出，由等待线程直接回调
+                self._exited.append(watch)
+            else:
+                self._watches[key] = watch
+            self._stopped = False
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="ExitWatcher", daemon=True
+                )
+                self._thread.start()
+        self._waiter.wake()
+
+    def unwatch(self, key):
+        """取消对指定名称的监视"""
+        with self._lock:
+            watch = self._watches.pop(key, None)
+            if watch is not None:
+                self._to_close.append(watch.handle)
+        if watch is not None:
+            self._waiter.wake()
+
+    def stop(self):
+        """取消全部监视并结束等待线程"""
+        with self._lock:
+            self._to_close.extend(watch.handle for watch in self._watches.values())
+            self._watches.clear()
+            self._exited.clear()
+            self._stopped = True
+            thread = self._thread
+        self._waiter.wake()
+        if thread is not None:
+            thread.join(timeout=self._wait_slice + 1)
+
+    def _close_pending(self):
+        with self._lock:
+            handles, self._to_close = self._to_close, []
+        for handle in handles:
+            try:
+                self._waiter.close(handle)
+            except Exception:
+                pass
+
+    def _notify(self, watch):
+        # 快照里可能还保留着刚退出的PID
+        invalidate_snapshot()
+        try:
+            watch.callback(watch.key, watch.pid)
+        except Exception as e:
+            logger.error(f"{watch.key} 退出回调出错: {e}", exc_info=True)
+
+    def _run(self):
+        while True:
+            self._close_pending()
+            with self._lock:
+                if self._stopped:
+                    self._thread = None
+                    return
+                exited, self._exited = self._exited, []
+                watches = {watch.handle: watch for watch in self._watches.values()}
+            for watch in exited:
+                self._notify(watch)
+
+            try:
+                ready = self._waiter.wait(list(watches), self._wait_slice)
+            except Exception as e:
+                # 清空监视列表，各服务下次检查通过时会用轮询方式重新监视
+                logger.error(f"等待进程退出出错，改为轮询: {e}")
+                with self._lock:
+                    old_waiter, self._waiter = self._waiter, _PollingWaiter()
+                    handles = self._to_close + [w.handle for w in watches.values()]
+                    self._to_close = []
+                    self._watches.clear()
+                for handle in handles:
+                    try:
+                        old_waiter.close(handle)
+                    except Exception:
+                        pass
+                continue
+
+            for handle in ready:
+                watch = watches[handle]
+                with self._lock:
+                    # 等待期间可能已被取消或替换
+                    if self._watches.get(watch.key) is not watch:
+                        continue
+                    del self._watches[watch.key]
+                    self._to_close.append(handle)
+                self._notify(watch)
@@ -1,23 +1,12 @@
 """
 游戏启动器模块
-处理Diablo III和Battle.net的启动逻辑
+处理Diablo III和Battle.net的启动逻辑，具体步骤见启动流程文件 launch_workflow.json
 """
 
-import subprocess
-import time
 import logging
-from config import (
-    D3_PROCESS_NAME,
-    BATTLE_NET_PROCESS_NAME,
-    BATTLE_NET_EXE_PATH,
-    PLAY_BUTTON_IMAGE,
-    BATTLE_NET_OPTION_IMAGE,
-    BATTLE_NET_LOGIN_IMAGE,
-    NETEASE_SUBMIT_IMAGE,
-    BATTLE_NET_START_DELAY,
-)
-from process_manager import is_process_running, focus_process_window
-from image_finder import find_and_click_image
+from config import D3_PROCESS_NAME, BATTLE_NET_PROCESS_NAME
+from process_manager import is_process_running
+from launch_workflow import run_workflow
 
 logger = logging.getLogger()
 
@@ -29,70 +18,37 @@ def launch_battle_net():
         return True
 
     logger.info("正在启动 Battle.net...")
-    try:
-        subprocess.Popen(BATTLE_NET_EXE_PATH)
-        logger.info("Battle.net 正在加载...")
-        time.sleep(BATTLE_NET_START_DELAY)
-
-        # 处理启动时的弹窗
-        _handle_battle_net_popups()
-
-        if is_process_running(BATTLE_NET_PROCESS_NAME):
-            logger.info("Battle.net 启动成功")
-            return True
-        else:
-            logger.warning("Battle.net 启动后进程未找到")
-            return False
-    except Exception as e:
-        logger.error(f"启动 Battle.net 时出错: {e}")
+    # 启动进程、等待窗口就绪、处理弹窗
+    if run_workflow("battle_net"):
+        logger.info("Battle.net 启动成功")
+        return True
+    else:
+        logger.warning("Battle.net 启动失败")
         return False
 
 
-def _handle_battle_net_popups():
-    """处理Battle.net启动时的弹窗"""
-    # 点击单选按钮
-    find_and_click_image(
-        BATTLE_NET_OPTION_IMAGE, description="单选按钮", check_file=False
-    )
-
-    # 点击确认按钮
-    find_and_click_image(
-        BATTLE_NET_LOGIN_IMAGE,
-        description="确认按钮",
-        check_file=False,
-    )
+def launch_diablo_iii(ensure_battle_net=True):
+    """
+    启动Diablo III游戏
 
-    # 点击浏览器中的确定按钮
-    find_and_click_image(
-        NETEASE_SUBMIT_IMAGE,
-        description="浏览器中的'确定'按钮",
-        check_file=False,
-    )
-
-
-def launch_diablo_iii():
-    """启动Diablo III游戏"""
-    # 确保Battle.net正在运行
-    if not launch_battle_net():
-        logger.error("无法启动 Battle.net，无法继续启动游戏")
-        return False
-
-    # 查找Battle.net窗口
-    battle_net_window = focus_process_window(
-        BATTLE_NET_PROCESS_NAME, title_hint="Battle.net"
-    )
-    if not battle_net_window:
-        logger.warning("未找到 Battle.net 窗口")
+    参数:
+        ensure_battle_net: 是否在此处启动Battle.net；由依赖图调度时
+            Battle.net 已先行恢复，只需确认其正在运行
+    """
+    if ensure_battle_net:
+        if not launch_battle_net():
+            logger.error("无法启动 Battle.net，无法继续启动游戏")
+            return False
+    elif not is_battle_net_running():
+        logger.error("Battle.net 未运行，无法继续启动游戏")
         return False
 
-    logger.info(f"找到 Battle.net 窗口，位置: {battle_net_window}")
-
-    # 点击Play按钮
-    if find_and_click_image(PLAY_BUTTON_IMAGE, description="Play按钮"):
-        logger.info("已点击 Play 按钮，游戏正在启动...")
+    # 激活Battle.net窗口并点击Play按钮，等待游戏进程出现
+    if run_workflow("diablo_iii"):
+        logger.info("已点击 Play 按钮，游戏进程已启动")
         return True
     else:
-        logger.warning("未能找到并点击 Play 按钮")
+        logger.warning("未能点击 Play 按钮，或游戏进程未在规定时间内启动")
         return False
 
 
@@ -0,0 +1,56 @@
+"""
+界面日志处理器模块
+在内存中保留最近的日志，并通过线程安全的队列交给 Tk 线程显示，无需读取日志文件
+"""
+
+import logging
+from collections import deque
+
+
+class RingBufferHandler(logging.Handler):
+    """定长环形缓冲区日志处理器，内存占用不随运行时间增长"""
+
+    def __init__(self, capacity, level=logging.NOTSET):
+        """
+        参数:
+            capacity: 保留的最近日志条数，同时也是待显示队列的上限
+            level: 日志级别
+        """
+        super().__init__(level)
+        self.capacity = capacity
+        self._recent = deque(maxlen=capacity)
+        # 界面长时间未取走时最旧的条目被丢弃，界面本身也只显示最后 capacity 行
+        self._pending = deque(maxlen=capacity)
+
+    def emit(self, record):
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        # handle() 已持有 self.lock
+        self._recent.append(message)
+        self._pending.append(message)
+
+    def attach(self):
+        """
+        界面创建时调用：返回当前保留的全部日志，并清空待显示队列
+
+        返回:
+            list: 最近的日志（从旧到新）
+        """
+        with self.lock:
+            self._pending.clear()
+            return list(self._recent)
+
+    def drain(self):
+        """
+        取走上次之后的新日志（在 Tk 线程中调用）
+
+        返回:
+            list: 新日志（从旧到新）
+        """
+        with self.lock:
+            messages = list(self._pending)
+            self._pending.clear()
+        return messages
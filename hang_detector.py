@@ -0,0 +1,146 @@
+"""
+卡死检测模块
+每次检查时采样进程的CPU时间、IO次数以及窗口"未响应"状态，
+在定长环形缓冲区中累积增量，超过阈值时判定服务已卡死
+"""
+
+import logging
+import time
+
+import psutil
+
+from config import (
+    HANG_SAMPLE_WINDOW,
+    HANG_CPU_PERCENT,
+    HANG_IO_OPS,
+    HANG_NOT_RESPONDING_SAMPLES,
+)
+from process_manager import (
+    get_tracked_pid,
+    find_process_window,
+    is_window_hung,
+)
+from ring_buffer import RingBuffer
+
+logger = logging.getLogger()
+
+
+class HangDetector:
+    """单个服务的卡死检测"""
+
+    def __init__(
+        self,
+        process_name,
+        title_hint=None,
+        check_cpu=True,
+        check_window=True,
+        sample_window=HANG_SAMPLE_WINDOW,
+        cpu_percent=HANG_CPU_PERCENT,
+        io_ops=HANG_IO_OPS,
+        not_responding_samples=HANG_NOT_RESPONDING_SAMPLES,
+    ):
+        """
+        参数:
+            process_name: 进程名称
+            title_hint: 可选窗口标题关键字
+            check_cpu: 是否按CPU/IO持续空闲判定卡死
+            check_window: 是否按窗口持续未响应判定卡死
+            sample_window: CPU/IO判定所需的连续采样数
+            cpu_percent: 每次采样间隔内CPU占用低于该百分比视为空闲
+            io_ops: 每次采样间隔内IO次数不超过该值视为空闲
+            not_responding_samples: 窗口连续未响应该次数后判定卡死
+        """
+        self.process_name = process_name
+        self.title_hint = title_hint
+        self.check_cpu = check_cpu
+        self.check_window = check_window
+        self.cpu_percent = cpu_percent
+        self.io_ops = io_ops
+        self.not_responding_samples = not_responding_samples
+        self._cpu_usage = RingBuffer(sample_window)
+        self._io_ops = RingBuffer(sample_window)
+        self._process = None
+        self._last = None
+        self._not_responding = 0
+
+    def reset(self):
+        """清空采样（进程重启或被终止后调用）"""
+        self._cpu_usage.clear()
+        self._io_ops.clear()
+        self._process = None
+        self._last = None
+        self._not_responding = 0
+
+    def _current_process(self):
+        """返回正在跟踪的进程，PID变化时重新开始采样"""
+        pid = get_tracked_pid(self.process_name)
+        if pid is None:
+            self.reset()
+            return None
+        if self._process is None or self._process.pid != pid:
+            self.reset()
+            self._process = psutil.Process(pid)
+        return self._process
+
+    @staticmethod
+    def _read_counters(process):
+        cpu = process.cpu_times()
+        try:
+            io = process.io_counters()
+            io_total = io.read_count + io.write_count + getattr(io, "other_count", 0)
+        except (psutil.AccessDenied, AttributeError):
+            io_total = None
+        return time.monotonic(), cpu.user + cpu.system, io_total
+
+    def _sample_usage(self, process):
+        """只保存与上一次采样的增量"""
+        now, cpu_total, io_total = self._read_counters(process)
+        if self._last is not None:
+            last_time, last_cpu, last_io = self._last
+            elapsed = now - last_time
+            if elapsed > 0:
+                self._cpu_usage.append((cpu_total - last_cpu) / elapsed * 100)
+                self._io_ops.append(
+                    io_total - last_io
+                    if io_total is not None and last_io is not None
+                    else 0
+                )
+        self._last = (now, cpu_total, io_total)
+
+    def _sample_window(self):
+        hwnd = find_process_window(self.process_name, self.title_hint)
+        if hwnd and is_window_hung(hwnd):
+            self._not_responding += 1
+        else:
+            self._not_responding = 0
+
+    def sample(self):
+        """
+        采样一次并判断是否卡死
+
+        返回:
+            str: 判定卡死的原因；未卡死或无法采样时返回None
+        """
+        try:
+            process = self._current_process()
+            if process is None:
+                return None
+            if self.check_cpu:
+                self._sample_usage(process)
+            if self.check_window:
+                self._sample_window()
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.debug(f"采样 {self.process_name} 失败: {e}")
+            self.reset()
+            return None
+
+        if self.check_window and self._not_responding >= self.not_responding_samples:
+            return f"窗口连续 {self._not_responding} 次未响应"
+        if (
+            self.check_cpu
+            and self._cpu_usage.full
+            and (self._cpu_usage.values() < self.cpu_percent).all()
+            and (self._io_ops.values() <= self.io_ops).all()
+        ):
+            return f"连续 {self._cpu_usage.capacity} 次采样CPU与IO均无活动"
+        return None
@@ -0,0 +1,102 @@
+"""
+命中位置记忆模块
+记录每个模板上一次相对所属窗口的命中位置，下次先在该位置做小块校验
+"""
+
+import json
+import logging
+import os
+import threading
+
+from config import HIT_MEMO_FILE
+
+logger = logging.getLogger()
+
+
+class HitMemo:
+    """模板命中位置记忆，按模板路径保存相对窗口的偏移、窗口大小与DPI"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取命中位置记录 {self.path} 失败: {e}")
+            self._entries = {}
+
+    def _save(self):
+        """写入临时文件后原子替换，避免中途退出留下损坏的记录"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存命中位置记录 {self.path} 失败: {e}")
+
+    def lookup(self, image_path, window_rect, dpi):
+        """
+        查找可用的记忆位置
+
+        参数:
+            image_path: 模板路径
+            window_rect: 当前窗口矩形 (left, top, width, height)
+            dpi: 当前窗口DPI
+
+        返回:
+            tuple: 记忆位置的屏幕坐标 (left, top)；无记录或窗口大小/DPI变化时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(image_path)
+            if entry is None:
+                return None
+            if entry["window_size"] != [window_rect[2], window_rect[3]] or (
+                entry["dpi"] != dpi
+            ):
+                # 窗口大小或DPI变化后按钮位置不再可靠
+                del self._entries[image_path]
+                self._save()
+                return None
+            offset_x, offset_y = entry["offset"]
+        return (window_rect[0] + offset_x, window_rect[1] + offset_y)
+
+    def remember(self, image_path, window_rect, dpi, hit_left, hit_top):
+        """记录一次成功命中（屏幕坐标）相对窗口的位置"""
+        entry = {
+            "offset": [hit_left - window_rect[0], hit_top - window_rect[1]],
+            "window_size": [window_rect[2], window_rect[3]],
+            "dpi": dpi,
+        }
+        with self._lock:
+            if self._entries.get(image_path) == entry:
+                return
+            self._entries[image_path] = entry
+            self._save()
+
+    def forget(self, image_path):
+        """校验失败时删除记录"""
+        with self._lock:
+            if self._entries.pop(image_path, None) is not None:
+                self._save()
+
+
+_hit_memo = None
+_hit_memo_lock = threading.Lock()
+
+
+def get_hit_memo():
+    """获取全局命中位置记忆（首次调用时从磁盘加载）"""
+    global _hit_memo
+    if _hit_memo is None:
+        with _hit_memo_lock:
+            if _hit_memo is None:
+                _hit_memo = HitMemo(HIT_MEMO_FILE)
+    return _hit_memo
@@ -3,19 +3,248 @@
 处理图片识别和点击操作
 """
 
-import os
 import time
+import threading
 import pyautogui
 import logging
 from config import (
     IMAGE_SEARCH_MAX_ATTEMPTS,
     IMAGE_SEARCH_CONFIDENCE,
     IMAGE_SEARCH_RETRY_DELAY,
+    IMAGE_MATCH_ENGINE,
+    IMAGE_MATCH_METHOD,
+    IMAGE_SEARCH_PYRAMID,
+    IMAGE_SEARCH_PYRAMID_FACTOR,
+    IMAGE_SEARCH_PYRAMID_CANDIDATES,
+    POPUP_SEARCH_IDLE_ATTEMPTS,
+    IMAGE_SEARCH_REGION_MARGIN,
+    IMAGE_HIT_MEMO_ENABLED,
+    FRAME_CHANGE_TILE_SIZE,
+    FRAME_CHANGE_TOLERANCE,
+    CAPTURE_BACKEND,
     CLICK_DELAY,
+    SHARED_FRAME_MAX_AGE,
 )
+from event_log import EVENT_CLICK, record_event
+from frame_change import TileChangeDetector, expand_for_template
+from hit_memo import get_hit_memo
+from process_manager import find_process_window, get_window_rect, get_window_dpi
+from screen_capture import create_capture_backend
+from template_matcher import get_match_engine, to_gray_array
+from template_registry import get_template
 
 logger = logging.getLogger()
 
+_match_engine = get_match_engine(
+    IMAGE_MATCH_ENGINE,
+    IMAGE_MATCH_METHOD,
+    IMAGE_SEARCH_PYRAMID_FACTOR if IMAGE_SEARCH_PYRAMID else 1,
+    IMAGE_SEARCH_PYRAMID_CANDIDATES,
+)
+
+
+_capture_backend = create_capture_backend(CAPTURE_BACKEND)
+
+# 最近一次截图 (截图时间, 屏幕区域, 灰度数组)，供其他线程在有效期内复用
+_shared_frame = None
+_shared_frame_lock = threading.Lock()
+
+# 鼠标点击的互斥锁，后台弹窗哨兵与启动流程不会交错移动鼠标
+input_lock = threading.RLock()
+
+
+def set_match_engine(engine):
+    """替换当前使用的匹配引擎（需实现 locate(template, haystack, confidence)）"""
+    global _match_engine
+    _match_engine = engine
+
+
+def set_capture_backend(backend):
+    """替换当前使用的截图后端（如测试时使用 FakeCaptureBackend）"""
+    global _capture_backend
+    _capture_backend = backend
+
+
+def get_capture_stats():
+    """返回截图缓冲区的分配统计，用于观察内存分配是否平稳"""
+    return _capture_backend.pool.stats()
+
+
+def resolve_search_region(
+    region=None,
+    hwnd=None,
+    process_name=None,
+    title_hint=None,
+    margin=IMAGE_SEARCH_REGION_MARGIN,
+):
+    """
+    确定截图与匹配的屏幕区域
+
+    参数:
+        region: 直接指定的区域 (left, top, width, height)
+        hwnd: 窗口句柄，取其窗口矩形
+        process_name: 进程名称，取其可见窗口的矩形
+        title_hint: 配合process_name使用的窗口标题关键字
+        margin: 向四周扩展的像素数
+
+    返回:
+        tuple: (left, top, width, height)；未指定或找不到窗口时返回 None（全屏）
+    """
+    if region is None:
+        if hwnd is None and process_name:
+            hwnd = find_process_window(process_name, title_hint)
+        if hwnd:
+            region = get_window_rect(hwnd)
+    if region is None:
+        return None
+
+    left, top, width, height = region
+    if width <= 0 or height <= 0:
+        return None
+    return (left - margin, top - margin, width + 2 * margin, height + 2 * margin)
+
+
+def _grab(region):
+    """截取指定区域的灰度图（位于复用缓冲区中，下次截图会被覆盖）"""
+    global _shared_frame
+    # 持锁截图，其他线程复制共享帧时缓冲区不会被同时覆盖
+    with _shared_frame_lock:
+        frame = _capture_backend.grab(region)
+        _shared_frame = (time.monotonic(), _full_screen_if_none(region), frame)
+    return frame
+
+
+def grab_shared(region=None, max_age=SHARED_FRAME_MAX_AGE):
+    """
+    获取指定区域的截图，优先复用其他线程在 max_age 秒内截取的、覆盖该区域的画面
+
+    参数:
+        region: (left, top, width, height)，None表示完整屏幕
+        max_age: 可复用画面的最长时间（秒）
+
+    返回:
+        tuple: (灰度数组, 区域)；复用时返回的是副本
+    """
+    region = _full_screen_if_none(region)
+    left, top, width, height = region
+    with _shared_frame_lock:
+        if _shared_frame is not None:
+            captured_at, (shared_left, shared_top, _, _), frame = _shared_frame
+            x, y = left - shared_left, top - shared_top
+            if (
+                time.monotonic() - captured_at <= max_age
+                and x >= 0
+                and y >= 0
+                and x + width <= frame.shape[1]
+                and y + height <= frame.shape[0]
+            ):
+                return frame[y : y + height, x : x + width].copy(), region
+    return _grab(region), region
+
+
+def _full_screen_if_none(region):
+    """未指定区域时使用截图后端的完整屏幕范围，便于统一换算坐标"""
+    return region if region is not None else _capture_backend.screen_rect()
+
+
+def _to_screen(found_image, region):
+    """把区域内的匹配坐标换算为屏幕坐标"""
+    if region is None:
+        return found_image
+    return found_image._replace(
+        left=found_image.left + region[0], top=found_image.top + region[1]
+    )
+
+
+def _verify_remembered_hit(img_path, template, window_rect, dpi, confidence):
+    """
+    在记忆的位置截取与模板同样大小的小块进行校验
+
+    返回:
+        MatchResult: 校验通过时返回屏幕坐标下的匹配，否则返回 None
+    """
+    memo = get_hit_memo()
+    position = memo.lookup(img_path, window_rect, dpi)
+    if position is None:
+        return None
+    patch_region = (position[0], position[1], template.width, template.height)
+    found_image = _match_engine.locate(template, _grab(patch_region), confidence)
+    if not found_image:
+        memo.forget(img_path)
+        return None
+    return _to_screen(found_image, patch_region)
+
+
+def _locate_changed(template, screenshot, detector, confidence):
+    """
+    只在画面相对上一次失败尝试发生变化的区域内匹配
+
+    返回:
+        MatchResult: 截图坐标下的匹配；画面无变化或未找到时返回 None
+    """
+    gray = to_gray_array(screenshot)
+    bbox = detector.update(gray)
+    if bbox is None:
+        return None
+
+    top, left, bottom, right = expand_for_template(bbox, template, gray.shape)
+    if (top, left, bottom, right) == (0, 0, gray.shape[0], gray.shape[1]):
+        return _match_engine.locate(template, gray, confidence)
+
+    changed_area = gray[top:bottom, left:right]
+    found_image = _match_engine.locate(template, changed_area, confidence)
+    if not found_image:
+        return None
+    return found_image._replace(left=found_image.left + left, top=found_image.top + top)
+
+
+def _click_match(found_image, target=None, started=None):
+    """
+    移动鼠标到匹配区域中心并点击，并记录点击事件
+
+    参数:
+        found_image: 屏幕坐标下的 MatchResult
+        target: 图片路径
+        started: 找到目标的那次截图开始时的 time.monotonic()，用于计算点击延迟
+    """
+    x, y = pyautogui.center(found_image)
+    with input_lock:
+        pyautogui.moveTo(x, y, duration=0.3)
+        pyautogui.click()
+        clicked_at = time.monotonic()
+        time.sleep(CLICK_DELAY)
+    record_event(
+        EVENT_CLICK,
+        target=target,
+        x=int(x),
+        y=int(y),
+        score=round(float(found_image.score), 4),
+        latency_ms=(
+            None if started is None else round((clicked_at - started) * 1000, 1)
+        ),
+    )
+
+
+def _click_and_restore(found_image, target=None, started=None):
+    """在输入锁内记录鼠标位置、点击并移回原处，其他线程的鼠标操作不会插入其间"""
+    with input_lock:
+        original_pos = pyautogui.position()
+        _click_match(found_image, target, started)
+        pyautogui.moveTo(original_pos)
+
+
+def click_match(found_image, region=None, target=None, started=None):
+    """
+    点击匹配结果的中心
+
+    参数:
+        found_image: MatchResult
+        region: 匹配所在截图的屏幕区域，None表示匹配坐标已是屏幕坐标
+        target: 图片路径，用于事件记录
+        started: 查找开始时的 time.monotonic()，用于计算点击延迟
+    """
+    _click_match(_to_screen(found_image, region), target, started)
+
 
 def find_and_click_image(
     image_paths,
@@ -23,6 +252,11 @@ def find_and_click_image(
     confidence=IMAGE_SEARCH_CONFIDENCE,
     description="",
     check_file=True,
+    region=None,
+    hwnd=None,
+    process_name=None,
+    title_hint=None,
+    margin=IMAGE_SEARCH_REGION_MARGIN,
 ):
     """
     查找图片并点击
@@ -33,6 +267,11 @@ def find_and_click_image(
         confidence: 匹配置信度，默认0.8
         description: 描述信息，用于日志输出
         check_file: 是否检查文件是否存在，默认True
+        region: 可选，只在该区域 (left, top, width, height) 内查找
+        hwnd: 可选，只在该窗口矩形内查找
+        process_name: 可选，只在该进程的窗口矩形内查找
+        title_hint: 可选，配合process_name使用的窗口标题关键字
+        margin: 区域向四周扩展的像素数
 
     返回:
         bool: 成功找到并点击返回True，否则返回False
@@ -41,40 +280,99 @@ def find_and_click_image(
     if isinstance(image_paths, str):
         image_paths = [image_paths]
 
+    # 从模板注册表获取已解码的模板，已注册的模板不再访问磁盘
+    templates = {}
+    for img_path in image_paths:
+        try:
+            templates[img_path] = get_template(img_path)
+        except Exception as e:
+            if description:
+                logger.error(f"读取{description}的图片 {img_path} 失败: {e}")
+            templates[img_path] = None
+
     # 检查图片文件是否存在
     if check_file:
         for img_path in image_paths:
-            if not os.path.exists(img_path):
+            if templates[img_path] is None:
                 if description:
                     logger.warning(
                         f"警告: {description} 的图片文件 {img_path} 不存在！"
                     )
                 return False
 
-    # 记录鼠标初始位置
-    original_pos = pyautogui.position()
+    # 确定所属窗口，用于限定查找区域和记忆命中位置
+    window_rect = None
+    dpi = None
+    try:
+        if hwnd is None and region is None and process_name:
+            hwnd = find_process_window(process_name, title_hint)
+        if hwnd:
+            window_rect = get_window_rect(hwnd)
+            dpi = get_window_dpi(hwnd)
+    except Exception as e:
+        logger.warning(f"获取窗口区域失败，改为全屏查找: {e}")
+        hwnd = None
+
+    # 只截取目标窗口所在区域，减少截图和匹配的像素量
+    search_region = _full_screen_if_none(
+        resolve_search_region(region or window_rect, margin=margin)
+    )
+    use_memo = IMAGE_HIT_MEMO_ENABLED and window_rect is not None
 
     # 尝试查找并点击图片
     for img_path in image_paths:
         if description:
             logger.info(f"正在查找{description}...")
 
+        template = templates[img_path]
+        if template is None:
+            continue
+
+        # 先校验上次的命中位置，通过则无需全区域查找
+        if use_memo:
+            started = time.monotonic()
+            try:
+                found_image = _verify_remembered_hit(
+                    img_path, template, window_rect, dpi, confidence
+                )
+            except Exception as e:
+                logger.warning(f"校验{description}记忆位置时出错: {e}")
+                found_image = None
+            if found_image:
+                _click_and_restore(found_image, img_path, started)
+                if description:
+                    logger.info(f"已点击{description}（记忆位置）。")
+                return True
+
+        # 等待按钮出现时画面通常是静止的，未变化的帧无需重新匹配
+        detector = TileChangeDetector(FRAME_CHANGE_TILE_SIZE, FRAME_CHANGE_TOLERANCE)
         for attempt in range(max_attempts):
+            # 最后一次尝试总是完整匹配，避免变化检测漏掉的按钮被判定为不存在
+            if attempt == max_attempts - 1:
+                detector.reset()
             try:
-                found_image = pyautogui.locateOnScreen(img_path, confidence=confidence)
+                started = time.monotonic()
+                screenshot = _grab(search_region)
+                found_image = _locate_changed(
+                    template, screenshot, detector, confidence
+                )
                 if found_image:
-                    x, y = pyautogui.center(found_image)
-                    pyautogui.moveTo(x, y, duration=0.3)
-                    pyautogui.click()
-                    time.sleep(CLICK_DELAY)
+                    found_image = _to_screen(found_image, search_region)
+                    # 点击后鼠标返回原始位置
+                    _click_and_restore(found_image, img_path, started)
+                    if use_memo:
+                        get_hit_memo().remember(
+                            img_path,
+                            window_rect,
+                            dpi,
+                            found_image.left,
+                            found_image.top,
+                        )
                     if description:
                         logger.info(f"已点击{description}。")
-                    # 鼠标返回原始位置
-                    pyautogui.moveTo(original_pos)
                     return True
-            except pyautogui.ImageNotFoundException:
-                pass
             except Exception as e:
+                detector.reset()
                 if description:
                     logger.error(f"查找{description}时出错: {e}")
             time.sleep(IMAGE_SEARCH_RETRY_DELAY)
@@ -83,3 +381,149 @@ def find_and_click_image(
     if description:
         logger.warning(f"未能找到并点击{description}。")
     return False
+
+
+def find_images(
+    templates, screenshot, confidence=IMAGE_SEARCH_CONFIDENCE, changed=None
+):
+    """
+    在同一帧截图上匹配多个模板
+
+    参数:
+        templates: {图片路径: TemplateImage}
+        screenshot: 截图
+        confidence: 匹配置信度
+        changed: 可选，画面变化区域 (top, left, bottom, right)，只在受其影响的范围内匹配
+
+    返回:
+        dict: {图片路径: MatchResult}，只包含找到的图片
+    """
+    left = top = 0
+    if changed is not None:
+        gray = to_gray_array(screenshot)
+        bounds = [
+            expand_for_template(changed, template, gray.shape)
+            for template in templates.values()
+        ]
+        top = min(b[0] for b in bounds)
+        left = min(b[1] for b in bounds)
+        bottom = max(b[2] for b in bounds)
+        right = max(b[3] for b in bounds)
+        screenshot = gray[top:bottom, left:right]
+
+    frame = _match_engine.prepare(screenshot)
+    found = {}
+    for img_path, template in templates.items():
+        result = _match_engine.locate(template, frame, confidence)
+        if result:
+            found[img_path] = result._replace(
+                left=result.left + left, top=result.top + top
+            )
+    return found
+
+
+def locate_image(
+    image_path,
+    confidence=IMAGE_SEARCH_CONFIDENCE,
+    region=None,
+    process_name=None,
+    title_hint=None,
+    margin=IMAGE_SEARCH_REGION_MARGIN,
+):
+    """
+    截取一帧并查找图片（不点击）
+
+    参数:
+        image_path: 图片路径
+        confidence: 匹配置信度
+        region: 可选，只在该区域 (left, top, width, height) 内查找
+        process_name: 可选，只在该进程的窗口矩形内查找
+        title_hint: 可选，配合process_name使用的窗口标题关键字
+        margin: 区域向四周扩展的像素数
+
+    返回:
+        MatchResult: 屏幕坐标下的匹配结果，未找到返回None
+    """
+    template = get_template(image_path)
+    search_region = _full_screen_if_none(
+        resolve_search_region(region, None, process_name, title_hint, margin)
+    )
+    # 轮询探测时可直接复用弹窗哨兵刚截取的画面
+    screenshot, search_region = grab_shared(search_region)
+    found_image = _match_engine.locate(
+        template, _match_engine.prepare(screenshot), confidence
+    )
+    if found_image is None:
+        return None
+    return _to_screen(found_image, search_region)
+
+
+def find_and_click_images(
+    targets,
+    max_idle_attempts=POPUP_SEARCH_IDLE_ATTEMPTS,
+    confidence=IMAGE_SEARCH_CONFIDENCE,
+    region=None,
+):
+    """
+    每轮截一次屏，同时匹配所有尚未点击的图片，并按顺序点击找到的图片
+
+    点击后界面可能弹出后续按钮，因此每次有新发现都会重新计数；
+    连续 max_idle_attempts 轮没有新发现时，剩余图片视为不存在
+
+    参数:
+        targets: [(图片路径, 描述), ...]，同一帧找到多个时按列表顺序点击
+        max_idle_attempts: 连续无发现的最大轮数，默认2轮
+        confidence: 匹配置信度，默认0.8
+        region: 可选，只在该区域 (left, top, width, height) 内查找，
+                可由 resolve_search_region 得到
+
+    返回:
+        dict: {图片路径: 是否已点击}
+    """
+    descriptions = dict(targets)
+    clicked = {img_path: False for img_path in descriptions}
+    pending = {}
+    for img_path in descriptions:
+        try:
+            template = get_template(img_path)
+        except Exception as e:
+            logger.error(f"读取{descriptions[img_path]}的图片 {img_path} 失败: {e}")
+            continue
+        if template is not None:
+            pending[img_path] = template
+
+    if not pending:
+        return clicked
+
+    region = _full_screen_if_none(region)
+    idle_attempts = 0
+    while pending and idle_attempts < max_idle_attempts:
+        started = time.monotonic()
+        try:
+            found = find_images(pending, _grab(region), confidence)
+        except Exception as e:
+            logger.error(f"批量查找图片时出错: {e}")
+            found = {}
+
+        if not found:
+            idle_attempts += 1
+            if idle_attempts < max_idle_attempts:
+                time.sleep(IMAGE_SEARCH_RETRY_DELAY)
+            continue
+
+        idle_attempts = 0
+        # 从记录鼠标位置到移回原处都持有输入锁，其他线程的点击不会插入其间
+        with input_lock:
+            original_pos = pyautogui.position()
+            for img_path in descriptions:
+                if img_path not in found:
+                    continue
+                _click_match(_to_screen(found[img_path], region), img_path, started)
+                logger.info(f"已点击{descriptions[img_path]}。")
+                clicked[img_path] = True
+                del pending[img_path]
+            pyautogui.moveTo(original_pos)
+
+    for img_path in pending:
+        logger.info(f"未发现{descriptions[img_path]}，跳过。")
+    return clicked
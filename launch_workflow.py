@@ -0,0 +1,318 @@
+"""
+启动流程模块
+从数据文件（launch_workflow.json）加载启动步骤并执行：
+每个步骤包含前置条件、动作、成功探测、超时与重试次数，
+前置条件已满足的步骤直接跳过，互不依赖的步骤并行执行，并记录每一步的用时
+"""
+
+import json
+import logging
+import os
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+from config import LAUNCH_WORKFLOW_FILE, PROJECT_ROOT
+from event_log import EVENT_LAUNCH_STEP, EVENT_LAUNCH_WORKFLOW, record_event
+from process_manager import focus_process_window
+from readiness import (
+    Probe,
+    wait_until_ready,
+    process_exists,
+    window_visible,
+    window_responding,
+    template_visible,
+)
+
+logger = logging.getLogger()
+
+STEP_SUCCEEDED = "succeeded"
+STEP_SKIPPED = "skipped"
+STEP_FAILED = "failed"
+STEP_BLOCKED = "blocked"
+
+
+def _start_process(path):
+    subprocess.Popen(path)
+    return True
+
+
+def _click_image(image, description="", process=None, title_hint=None):
+    from image_finder import find_and_click_image
+
+    return find_and_click_image(
+        image, description=description, process_name=process, title_hint=title_hint
+    )
+
+
+def _click_images(targets):
+    from image_finder import find_and_click_images
+
+    find_and_click_images([(t["image"], t.get("description", "")) for t in targets])
+    return True
+
+
+def _popup_sentinel_active():
+    # 延迟导入，哨兵依赖截图与匹配模块
+    from popup_sentinel import is_sentinel_active
+
+    return is_sentinel_active()
+
+
+def _focus_window(process, title_hint=None):
+    return focus_process_window(process, title_hint) is not None
+
+
+# 数据文件中可用的动作与探测，参数名与数据文件中的键一致
+ACTIONS = {
+    "start_process": _start_process,
+    "click_image": _click_image,
+    "click_images": _click_images,
+    "focus_window": _focus_window,
+}
+
+PROBES = {
+    "process_exists": lambda process: process_exists(process),
+    "window_visible": lambda process, title_hint=None: window_visible(
+        process, title_hint
+    ),
+    "window_responding": lambda process, title_hint=None: window_responding(
+        process, title_hint
+    ),
+    "template_visible": lambda image, process=None, title_hint=None: template_visible(
+        image, process, title_hint
+    ),
+    "popup_sentinel_active": lambda: Probe("弹窗哨兵", _popup_sentinel_active),
+}
+
+
+def _resolve(value):
+    """以 $ 开头的字符串取 config 中的同名配置，便于数据文件引用路径和进程名"""
+    if isinstance(value, str) and value.startswith("$"):
+        return getattr(config, value[1:])
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _resolve(item) for key, item in value.items()}
+    return value
+
+
+def _build_probe(spec):
+    params = _resolve({k: v for k, v in spec.items() if k != "probe"})
+    return PROBES[spec["probe"]](**params)
+
+
+class WorkflowStep:
+    """启动流程中的一个步骤"""
+
+    def __init__(self, spec):
+        self.id = spec["id"]
+        self.description = spec.get("description", self.id)
+        self.requires = list(spec.get("requires", []))
+        self.skip_if = [_build_probe(p) for p in spec.get("skip_if", [])]
+        self.action = spec.get("action")
+        self.success = [_build_probe(p) for p in spec.get("success", [])]
+        self.timeout = _resolve(spec.get("timeout", 30))
+        self.retries = spec.get("retries", 0)
+        self.retry_delay = spec.get("retry_delay", 1.0)
+        # 可选步骤失败不影响后续步骤和整个流程
+        self.optional = spec.get("optional", False)
+
+        if self.action is not None and self.action["type"] not in ACTIONS:
+            raise ValueError(f"步骤 {self.id} 使用了未知动作 {self.action['type']}")
+
+    def _run_action(self):
+        if self.action is None:
+            return True
+        params = _resolve({k: v for k, v in self.action.items() if k != "type"})
+        return ACTIONS[self.action["type"]](**params)
+
+    def _already_done(self):
+        """重试前检查：上一次尝试可能只是慢于超时，已满足时不再重复执行动作"""
+        for probes in (self.skip_if, self.success):
+            if probes and all(probe.check() for probe in probes):
+                return True
+        return False
+
+    def run(self):
+        """执行步骤，返回步骤状态"""
+        if self.skip_if and all(probe.check() for probe in self.skip_if):
+            logger.info(f"{self.description}：条件已满足，跳过")
+            return STEP_SKIPPED
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay)
+                try:
+                    if self._already_done():
+                        logger.info(f"{self.description}：上一次尝试已生效，不再重试")
+                        return STEP_SUCCEEDED
+                except Exception as e:
+                    logger.error(f"{self.description} 检查出错: {e}", exc_info=True)
+                logger.info(f"{self.description}：第 {attempt + 1} 次尝试")
+            try:
+                if self._run_action() and (
+                    not self.success
+                    or wait_until_ready(self.success, self.timeout, self.description)
+                ):
+                    return STEP_SUCCEEDED
+            except Exception as e:
+                logger.error(f"{self.description} 执行出错: {e}", exc_info=True)
+        logger.warning(f"{self.description} 失败")
+        return STEP_FAILED
+
+
+class WorkflowResult:
+    """一次流程执行的结果：是否成功以及每一步的状态和用时"""
+
+    def __init__(self, name):
+        self.name = name
+        self.steps = {}
+        self.elapsed = 0.0
+
+    @property
+    def succeeded(self):
+        """所有非可选步骤都成功或被跳过"""
+        return all(
+            status in (STEP_SUCCEEDED, STEP_SKIPPED)
+            for status, _, optional in self.steps.values()
+            if not optional
+        )
+
+    def record(self, step, status, elapsed):
+        self.steps[step.id] = (status, elapsed, step.optional)
+        record_event(
+            EVENT_LAUNCH_STEP,
+            workflow=self.name,
+            step=step.id,
+            status=status,
+            optional=step.optional,
+            duration_ms=round(elapsed * 1000, 1),
+        )
+
+    def log_timings(self):
+        lines = [
+            f"  {step_id}: {status} {elapsed:.2f}秒"
+            for step_id, (status, elapsed, _) in self.steps.items()
+        ]
+        logger.info(
+            f"流程 {self.name} 用时 {self.elapsed:.2f} 秒:\n" + "\n".join(lines)
+        )
+
+
+class Workflow:
+    """按依赖关系执行的步骤集合"""
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = {step.id: step for step in steps}
+        for step in steps:
+            for required in step.requires:
+                if required not in self.steps:
+                    raise ValueError(f"步骤 {step.id} 依赖的 {required} 不存在")
+
+    def run(self):
+        """
+        执行流程：依赖全部成功（或跳过）的步骤立即开始，互不依赖的步骤并行执行
+
+        返回:
+            WorkflowResult
+        """
+        result = WorkflowResult(self.name)
+        start = time.monotonic()
+        pending = dict(self.steps)
+        running = {}
+
+        with ThreadPoolExecutor(
+            max_workers=max(len(self.steps), 1), thread_name_prefix="Workflow"
+        ) as executor:
+            while pending or running:
+                self._start_ready_steps(pending, running, result, executor)
+
+                if not running:
+                    if pending:
+                        # 依赖无法满足（存在环），剩余步骤不再执行
+                        for step in pending.values():
+                            result.record(step, STEP_BLOCKED, 0.0)
+                        pending.clear()
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    status, elapsed = future.result()
+                    result.record(step, status, elapsed)
+
+        result.elapsed = time.monotonic() - start
+        result.log_timings()
+        record_event(
+            EVENT_LAUNCH_WORKFLOW,
+            workflow=self.name,
+            succeeded=result.succeeded,
+            duration_ms=round(result.elapsed * 1000, 1),
+        )
+        return result
+
+    def _start_ready_steps(self, pending, running, result, executor):
+        """提交依赖已完成的步骤；依赖失败的步骤标记为阻塞，并继续检查其后续步骤"""
+        progressed = True
+        while progressed:
+            progressed = False
+            for step in list(pending.values()):
+                statuses = [result.steps.get(r) for r in step.requires]
+                if any(s is None for s in statuses):
+                    continue
+                del pending[step.id]
+                progressed = True
+                if any(
+                    s[0] in (STEP_FAILED, STEP_BLOCKED) and not s[2] for s in statuses
+                ):
+                    result.record(step, STEP_BLOCKED, 0.0)
+                    continue
+                running[executor.submit(self._timed, step)] = step
+
+    @staticmethod
+    def _timed(step):
+        step_start = time.monotonic()
+        status = step.run()
+        return status, time.monotonic() - step_start
+
+
+def _workflow_file():
+    """优先使用程序目录下的流程文件，打包版本没有时使用随附的默认文件"""
+    if os.path.exists(LAUNCH_WORKFLOW_FILE):
+        return LAUNCH_WORKFLOW_FILE
+    return os.path.join(PROJECT_ROOT, os.path.basename(LAUNCH_WORKFLOW_FILE))
+
+
+def load_workflow(name, path=None):
+    """
+    从流程文件加载指定流程
+
+    参数:
+        name: 流程名称（如 "battle_net"）
+        path: 流程文件路径，默认为 LAUNCH_WORKFLOW_FILE
+
+    返回:
+        Workflow
+    """
+    with open(path or _workflow_file(), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    steps = [WorkflowStep(spec) for spec in data["workflows"][name]]
+    return Workflow(name, steps)
+
+
+def run_workflow(name):
+    """
+    加载并执行流程（每次执行都重新读取文件，修改后无需重启程序）
+
+    返回:
+        bool: 流程成功返回True
+    """
+    try:
+        workflow = load_workflow(name)
+    except Exception as e:
+        logger.error(f"加载启动流程 {name} 失败: {e}", exc_info=True)
+        return False
+    return workflow.run().succeeded
@@ -0,0 +1,180 @@
+"""
+异步日志模块
+各线程只把日志放入有界队列，由单独的写入线程分批写入文件、控制台和管理窗口，
+监控线程不再等待磁盘和控制台输出
+"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+from config import (
+    LOG_QUEUE_SIZE,
+    LOG_QUEUE_BLOCK_TIMEOUT,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL,
+)
+
+_STOP = object()
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """写入后不立即刷新，由写入线程在每批结束时统一 flush"""
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """控制台处理器，控制台窗口隐藏时直接跳过（不格式化也不输出）"""
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.enabled = True
+        self.addFilter(lambda record: self.enabled)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列处理器
+    队列满时普通日志直接丢弃并计数；WARNING 及以上最多等待 block_timeout 秒（背压），
+    仍然放不进去才丢弃
+    """
+
+    def __init__(self, log_queue, block_timeout=LOG_QUEUE_BLOCK_TIMEOUT):
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record):
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def take_dropped(self):
+        """返回并清零丢弃计数"""
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class LogPipeline:
+    """从队列取出日志交给下游处理器，按条数或时间间隔批量刷新"""
+
+    def __init__(
+        self,
+        handlers,
+        queue_size=LOG_QUEUE_SIZE,
+        batch_size=LOG_BATCH_SIZE,
+        flush_interval=LOG_FLUSH_INTERVAL,
+    ):
+        """
+        参数:
+            handlers: 下游处理器列表（在写入线程中调用）
+            queue_size: 队列容量
+            batch_size: 累计多少条日志后刷新一次
+            flush_interval: 有未刷新日志时最长等待多少秒刷新
+        """
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="LogWriter", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """写完队列中剩余的日志并刷新，可重复调用"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self.queue.put(_STOP)
+        thread.join(timeout)
+        for handler in self.handlers:
+            try:
+                handler.flush()
+                handler.close()
+            except Exception:
+                pass
+
+    def _handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush(self):
+        dropped = self.queue_handler.take_dropped()
+        if dropped:
+            self._handle(
+                logging.makeLogRecord(
+                    {
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": f"日志队列已满，丢弃了 {dropped} 条日志",
+                    }
+                )
+            )
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+
+    def _run(self):
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0)
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                break
+            if record is not None:
+                self._handle(record)
+                pending += 1
+
+            now = time.monotonic()
+            if pending and (
+                pending >= self.batch_size or now - last_flush >= self.flush_interval
+            ):
+                self._flush()
+                pending = 0
+                last_flush = now
+
+        # 停止前写完剩余日志
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not _STOP:
+                self._handle(record)
+        self._flush()
@@ -0,0 +1,266 @@
+"""
+日志轮转模块
+日志文件超过大小上限或程序重新启动时改名为带时间戳的分段，
+分段在后台线程中压缩为 .gz，启动时按保留天数和总大小清理旧分段
+"""
+
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from config import (
+    LOG_MAX_BYTES,
+    LOG_RETENTION_DAYS,
+    LOG_MAX_TOTAL_BYTES,
+)
+from log_pipeline import BufferedFileHandler
+
+logger = logging.getLogger()
+
+SEGMENT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+
+def _segment_prefix(base_filename):
+    """分段文件名前缀，如 logs/diablo3_launcher."""
+    root, _ = os.path.splitext(base_filename)
+    return root + "."
+
+
+def _legacy_segment_prefix(base_filename):
+    """旧版本按运行生成的日志文件前缀，如 logs/diablo3_launcher_（只用于清理，不再生成）"""
+    root, _ = os.path.splitext(base_filename)
+    return root + "_"
+
+
+def _segment_suffix(base_filename):
+    """分段文件扩展名，与当前日志文件相同（如 .log、.jsonl）"""
+    return os.path.splitext(base_filename)[1]
+
+
+def list_segments(base_filename):
+    """
+    列出已轮转的日志分段（含已压缩和尚未压缩的，以及旧版本留下的按运行命名的日志）
+
+    返回:
+        list: 分段路径，按修改时间从旧到新
+    """
+    log_dir = os.path.dirname(os.path.abspath(base_filename))
+    prefixes = (
+        os.path.basename(_segment_prefix(base_filename)),
+        os.path.basename(_legacy_segment_prefix(base_filename)),
+    )
+    current = os.path.basename(base_filename)
+    suffix = _segment_suffix(base_filename)
+    segments = []
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return []
+    for name in names:
+        if name == current or not name.startswith(prefixes):
+            continue
+        if not (name.endswith(suffix) or name.endswith(suffix + ".gz")):
+            continue
+        path = os.path.join(log_dir, name)
+        try:
+            segments.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    segments.sort()
+    return [path for _, path in segments]
+
+
+def _new_segment_path(base_filename):
+    """生成不与现有文件冲突的分段路径"""
+    stamp = time.strftime(SEGMENT_TIME_FORMAT)
+    prefix = _segment_prefix(base_filename)
+    suffix = _segment_suffix(base_filename)
+    path = f"{prefix}{stamp}{suffix}"
+    index = 1
+    while os.path.exists(path) or os.path.exists(path + ".gz"):
+        path = f"{prefix}{stamp}-{index}{suffix}"
+        index += 1
+    return path
+
+
+class LogCompressor:
+    """后台压缩线程，写入线程只负责改名，不等待压缩"""
+
+    def __init__(self, base_filename):
+        self.base_filename = base_filename
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, path):
+        """安排压缩一个分段"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="LogCompressor", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(path)
+
+    def _run(self):
+        while True:
+            try:
+                path = self._queue.get(timeout=5)
+            except queue.Empty:
+                # 空闲时退出，下次有任务再启动
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            compress_segment(path)
+            enforce_total_size(self.base_filename)
+
+
+def compress_segment(path):
+    """
+    将分段压缩为 path.gz 并删除原文件（先写临时文件，中途中断不会留下损坏的 .gz）
+
+    返回:
+        bool: 压缩成功返回True
+    """
+    target = path + ".gz"
+    temp = target + ".tmp"
+    try:
+        with open(path, "rb") as src, gzip.open(temp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(temp, target)
+        os.remove(path)
+        return True
+    except OSError as e:
+        logger.warning(f"压缩日志 {path} 失败: {e}")
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        return False
+
+
+def enforce_total_size(base_filename, max_total_bytes=LOG_MAX_TOTAL_BYTES):
+    """分段总大小超过上限时从最旧的开始删除"""
+    segments = list_segments(base_filename)
+    sizes = []
+    for path in segments:
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            sizes.append(0)
+    total = sum(sizes)
+    for path, size in zip(segments, sizes):
+        if total <= max_total_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            continue
+
+
+def prune_segments(base_filename, retention_days=LOG_RETENTION_DAYS):
+    """
+    删除超过保留天数的分段，并限制分段总大小
+
+    返回:
+        int: 按天数删除的分段数
+    """
+    cutoff = time.time() - retention_days * 86400
+    removed = 0
+    for path in list_segments(base_filename):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    enforce_total_size(base_filename)
+    return removed
+
+
+class RotatingLogHandler(BufferedFileHandler):
+    """超过大小上限时轮转的文件处理器（在日志写入线程中调用）"""
+
+    def __init__(
+        self, filename, max_bytes=LOG_MAX_BYTES, compressor=None, encoding="utf-8"
+    ):
+        """
+        参数:
+            filename: 当前日志文件路径
+            max_bytes: 单个文件的大小上限（字节）
+            compressor: LogCompressor，None表示分段不压缩
+            encoding: 文件编码
+        """
+        super().__init__(filename, mode="a", encoding=encoding)
+        self.max_bytes = max_bytes
+        self.compressor = compressor
+        try:
+            self._size = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._size = 0
+
+    def emit(self, record):
+        try:
+            message = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            data_size = len(message.encode(self.encoding or "utf-8", "replace"))
+            if self._size and self._size + data_size > self.max_bytes:
+                self.rotate()
+            self.stream.write(message)
+            self._size += data_size
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self):
+        """把当前文件改名为分段并重新打开，压缩交给后台线程"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        segment = rotate_file(self.baseFilename, self.compressor)
+        self.stream = self._open()
+        self._size = 0
+        return segment
+
+
+def rotate_file(filename, compressor=None):
+    """
+    将非空的日志文件改名为分段（启动时调用即为按运行轮转）
+
+    返回:
+        str: 分段路径，文件不存在或为空时返回None
+    """
+    try:
+        if os.path.getsize(filename) == 0:
+            return None
+    except OSError:
+        return None
+    segment = _new_segment_path(filename)
+    try:
+        os.replace(filename, segment)
+    except OSError as e:
+        logger.warning(f"轮转日志 {filename} 失败: {e}")
+        return None
+    if compressor is not None:
+        compressor.submit(segment)
+    return segment
+
+
+def start_new_run(filename, compressor=None):
+    """
+    程序启动时调用：保留上次运行的日志为分段，压缩遗留的未压缩分段，清理过期分段
+    """
+    prune_segments(filename)
+    if compressor is not None:
+        # 上次运行中断时未来得及压缩的分段
+        for path in list_segments(filename):
+            if not path.endswith(".gz"):
+                compressor.submit(path)
+    rotate_file(filename, compressor)
@@ -0,0 +1,86 @@
+"""
+日志增量读取模块
+记住日志文件的读取位置和文件标识，每次只读取新追加的内容，
+文件被截断或轮转后自动从头读取
+"""
+
+import os
+
+# 首次打开时最多向前读取的字节数，用于显示最近的日志
+INITIAL_TAIL_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 256 * 1024
+
+
+class LogTailer:
+    """跟踪单个日志文件的新增行"""
+
+    def __init__(self, path, max_lines, encoding="utf-8"):
+        """
+        参数:
+            path: 日志文件路径
+            max_lines: 每次最多返回的行数（首次打开或追加过多时只保留最后这些行）
+            encoding: 文件编码
+        """
+        self.path = path
+        self.max_lines = max_lines
+        self.encoding = encoding
+        self._identity = None
+        self._offset = 0
+        self._partial = b""
+
+    def _reset(self, identity, offset):
+        self._identity = identity
+        self._offset = offset
+        self._partial = b""
+
+    def read_new_lines(self):
+        """
+        读取上次之后新写入的完整行
+
+        返回:
+            tuple: (行列表, 是否重新开始)；重新开始表示首次读取或文件被截断/轮转，
+                   调用方应清空已显示的内容
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return [], False
+
+        identity = (stat.st_dev, stat.st_ino)
+        restarted = False
+        if self._identity is None:
+            # 首次读取：只从文件末尾附近开始
+            self._reset(identity, max(stat.st_size - INITIAL_TAIL_BYTES, 0))
+            restarted = True
+        elif identity != self._identity or stat.st_size < self._offset:
+            # 文件被轮转（换成新文件）或截断，从头读取
+            self._reset(identity, 0)
+            restarted = True
+
+        if stat.st_size == self._offset:
+            return [], restarted
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            # 追加内容很多时只保留末尾部分
+            pending = stat.st_size - self._offset
+            if pending > READ_CHUNK_BYTES:
+                f.seek(stat.st_size - READ_CHUNK_BYTES)
+                self._partial = b""
+                skip_first = True
+            else:
+                skip_first = self._offset > 0 and restarted
+            data = f.read()
+            self._offset = f.tell()
+
+        data = self._partial + data
+        lines = data.split(b"\n")
+        # 最后一段不以换行结尾，留到下次读取
+        self._partial = lines.pop()
+        if skip_first and lines:
+            lines.pop(0)
+        lines = lines[-self.max_lines :]
+        return [
+            line.decode(self.encoding, errors="replace").rstrip("\r") + "\n"
+            for line in lines
+        ], restarted
@@ -1,12 +1,26 @@
 """
 日志配置模块
-提供日志系统的初始化和配置功能
+提供日志系统的初始化和配置功能，日志经队列由单独的写入线程输出
 """
 
 import logging
 import os
 import sys
-from config import LOG_DIR, LOG_FILE_PREFIX, LOG_FORMAT, LOG_DATE_FORMAT
+from config import (
+    LOG_DIR,
+    LOG_FILE_PREFIX,
+    LOG_FORMAT,
+    LOG_DATE_FORMAT,
+    LOG_DISPLAY_LINES,
+)
+from gui_log_handler import RingBufferHandler
+from log_pipeline import ConsoleHandler, LogPipeline
+from log_rotation import LogCompressor, RotatingLogHandler, start_new_run
+
+# 供管理窗口显示的内存日志
+_gui_log_handler = None
+_console_handler = None
+_pipeline = None
 
 
 def _get_log_file_path():
@@ -20,13 +34,13 @@ def setup_logging():
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR)
 
+    # 停止之前的写入线程（关闭日志文件后才能改名）
+    shutdown_logging()
+
     log_filename = _get_log_file_path()
-    # 每次启动清空旧日志，保证只保留本次运行记录
-    try:
-        with open(log_filename, "w", encoding="utf-8"):
-            pass
-    except OSError as e:
-        raise RuntimeError(f"无法创建日志文件 {log_filename}: {e}")
+    # 上次运行的日志改名为分段并在后台压缩，同时清理过期分段
+    compressor = LogCompressor(log_filename)
+    start_new_run(log_filename, compressor)
 
     # 配置日志格式
     log_format = LOG_FORMAT
@@ -39,24 +53,55 @@ def setup_logging():
     # 清除现有的处理器
     logger.handlers.clear()
 
-    # 文件处理器（保存到文件）
-    file_handler = logging.FileHandler(log_filename, mode="w", encoding="utf-8")
+    # 文件处理器（保存到文件，由写入线程批量刷新，超过大小上限时轮转）
+    try:
+        file_handler = RotatingLogHandler(log_filename, compressor=compressor)
+    except OSError as e:
+        raise RuntimeError(f"无法创建日志文件 {log_filename}: {e}")
     file_handler.setLevel(logging.INFO)
     file_formatter = logging.Formatter(log_format, date_format)
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
 
-    # 控制台处理器（输出到控制台，保留彩色输出）
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
+    # 控制台处理器（输出到控制台，保留彩色输出；控制台隐藏时跳过）
+    global _console_handler, _gui_log_handler, _pipeline
+    _console_handler = ConsoleHandler(sys.stdout)
+    _console_handler.setLevel(logging.INFO)
     # 控制台格式不包含时间戳（因为代码中已经手动添加了）
     console_formatter = logging.Formatter("%(message)s")
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    _console_handler.setFormatter(console_formatter)
+
+    # 内存处理器（管理窗口直接显示，无需读取日志文件）
+    _gui_log_handler = RingBufferHandler(LOG_DISPLAY_LINES, logging.INFO)
+    _gui_log_handler.setFormatter(file_formatter)
+
+    # 根日志记录器只把日志放入队列，实际输出在写入线程中完成
+    _pipeline = LogPipeline([file_handler, _console_handler, _gui_log_handler])
+    logger.addHandler(_pipeline.queue_handler)
+    _pipeline.start()
 
     return logger, log_filename
 
 
+def set_console_logging(enabled):
+    """控制台窗口显示/隐藏时调用，隐藏期间不再向控制台输出日志"""
+    if _console_handler is not None:
+        _console_handler.enabled = enabled
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止写入线程（程序退出时调用）"""
+    global _pipeline
+    pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        logging.getLogger().removeHandler(pipeline.queue_handler)
+        pipeline.stop()
+
+
+def get_gui_log_handler():
+    """获取供管理窗口使用的内存日志处理器，日志未初始化时返回None"""
+    return _gui_log_handler
+
+
 def get_logger():
     """获取配置好的日志记录器"""
     logger = logging.getLogger()
@@ -4,20 +4,43 @@ Diablo III 自动启动器主程序
 
 import os
 import sys
-import threading
 import atexit
+import psutil
 import pyautogui
 import logging
+from functools import partial
 
 from config import (
     APP_NAME,
+    D3_PROCESS_NAME,
+    BATTLE_NET_PROCESS_NAME,
+    ROS_BOT_PROCESS_NAME,
+    EXIT_WATCHER_ENABLED,
     PYAUTOGUI_FAILSAFE,
     PYAUTOGUI_PAUSE,
     MONITOR_CHECK_INTERVAL,
     MONITOR_THREAD_CHECK_INTERVAL,
+    MONITOR_JITTER,
+    SCHEDULER_WORKERS,
+    POPUP_SENTINEL_ENABLED,
+    HANG_DETECTION_ENABLED,
+    RESOURCE_MONITOR_ENABLED,
+    RESOURCE_LIMITS,
     STOP_FILE,
+    CAPTURE_STATS_INTERVAL,
+)
+from logger_config import (
+    setup_logging,
+    get_gui_log_handler,
+    set_console_logging,
+    shutdown_logging,
+)
+from event_log import (
+    EVENT_CAPTURE_STATS,
+    record_event,
+    setup_event_log,
+    shutdown_event_log,
 )
-from logger_config import setup_logging
 from utils import (
     enable_ansi_support,
     is_admin,
@@ -29,10 +52,19 @@ from window_manager import WindowManager
 from game_launcher import is_diablo_iii_running, is_battle_net_running
 from rosbot_manager import is_rosbot_running
 from service_monitor import ServiceMonitor
+from scheduler import Scheduler
+from exit_watcher import ExitWatcher
+from popup_sentinel import PopupSentinel
+from process_manager import get_tracked_pid, terminate_process
+from hang_detector import HangDetector
+from resource_monitor import ResourceTracker, RecycleManager
+from template_registry import preload_templates
+from image_finder import get_capture_stats
 from service_rebooter import (
     restart_diablo_iii,
     restart_battle_net,
     restart_rosbot,
+    recycle_services,
 )
 
 # 启用Windows ANSI转义码支持（用于彩色输出）
@@ -41,12 +73,19 @@ enable_ansi_support()
 # 初始化日志
 logger, log_file = setup_logging()
 logger.info(f"日志文件已创建: {log_file}")
+event_file = setup_event_log()
+if event_file:
+    logger.info(f"事件日志: {event_file}")
 
 # 全局标志，用于控制后台循环
 _running = True
-_stop_event = threading.Event()
+_scheduler = Scheduler(workers=SCHEDULER_WORKERS)
 _window_manager = None
 _service_monitors = []
+_exit_watcher = ExitWatcher() if EXIT_WATCHER_ENABLED else None
+_popup_sentinel = PopupSentinel() if POPUP_SENTINEL_ENABLED else None
+_recycle_manager = None
+_last_capture_allocations = 0
 
 # 检查并请求管理员权限
 if not is_admin():
@@ -61,54 +100,114 @@ pyautogui.FAILSAFE = PYAUTOGUI_FAILSAFE
 pyautogui.PAUSE = PYAUTOGUI_PAUSE
 
 
+def _hang_detector(process_name, **kwargs):
+    """创建卡死检测器，未启用卡死检测时返回None"""
+    if not HANG_DETECTION_ENABLED:
+        return None
+    return HangDetector(process_name, **kwargs)
+
+
 def start_service_monitors():
-    """初始化并启动各服务的后台监控线程"""
-    global _service_monitors
+    """初始化各服务的监控，并注册到共享调度器"""
+    global _service_monitors, _recycle_manager
     _service_monitors = [
         ServiceMonitor(
             "Diablo III",
             is_diablo_iii_running,
             restart_diablo_iii,
             MONITOR_CHECK_INTERVAL,
-            _stop_event,
+            _scheduler,
+            pid_func=partial(get_tracked_pid, D3_PROCESS_NAME),
+            exit_watcher=_exit_watcher,
+            jitter=MONITOR_JITTER,
+            hang_detector=_hang_detector(D3_PROCESS_NAME, title_hint="Diablo III"),
+            terminate_func=partial(terminate_process, D3_PROCESS_NAME),
         ),
         ServiceMonitor(
             "Battle.net",
             is_battle_net_running,
             restart_battle_net,
             MONITOR_CHECK_INTERVAL,
-            _stop_event,
+            _scheduler,
+            pid_func=partial(get_tracked_pid, BATTLE_NET_PROCESS_NAME),
+            exit_watcher=_exit_watcher,
+            jitter=MONITOR_JITTER,
+            hang_detector=_hang_detector(
+                BATTLE_NET_PROCESS_NAME, title_hint="Battle.net", check_cpu=False
+            ),
+            terminate_func=partial(terminate_process, BATTLE_NET_PROCESS_NAME),
         ),
         ServiceMonitor(
             "ROS-BOT",
             is_rosbot_running,
             restart_rosbot,
             MONITOR_CHECK_INTERVAL,
-            _stop_event,
+            _scheduler,
+            pid_func=partial(get_tracked_pid, ROS_BOT_PROCESS_NAME),
+            exit_watcher=_exit_watcher,
+            jitter=MONITOR_JITTER,
+            hang_detector=_hang_detector(ROS_BOT_PROCESS_NAME),
+            terminate_func=partial(terminate_process, ROS_BOT_PROCESS_NAME),
         ),
     ]
     for monitor in _service_monitors:
         monitor.start()
+    # 资源持续增长时在崩溃前按顺序计划重启
+    if RESOURCE_MONITOR_ENABLED:
+        _recycle_manager = RecycleManager(
+            _scheduler,
+            [
+                ResourceTracker(process_name, limits)
+                for process_name, limits in RESOURCE_LIMITS.items()
+            ],
+            recycle_services,
+            monitors=_service_monitors,
+        )
+        _recycle_manager.start()
+    # 弹窗随时可能出现，由后台哨兵统一处理
+    if _popup_sentinel is not None:
+        _popup_sentinel.start()
+    _scheduler.start()
 
 
-def stop_file_watcher():
-    """监控停止文件，触发安全退出"""
-    global _window_manager
-    while _running and not _stop_event.is_set():
-        if os.path.exists(STOP_FILE):
-            logger.info("检测到停止文件，正在退出...")
-            try:
-                os.remove(STOP_FILE)
-            except Exception as e:
-                logger.warning(f"删除停止文件失败: {e}")
+def get_service_status():
+    """返回各服务监控的状态（熔断状态、连续失败次数）"""
+    return [monitor.status() for monitor in _service_monitors]
+
+
+def log_capture_stats():
+    """记录截图缓冲区分配统计和进程内存（由调度器定期执行），长时间运行时两者应保持平稳"""
+    global _last_capture_allocations
+    try:
+        stats = get_capture_stats()
+        rss = psutil.Process().memory_info().rss
+    except Exception as e:
+        logger.warning(f"获取截图缓冲区统计失败: {e}")
+        return
+    new_allocations = stats["allocations"] - _last_capture_allocations
+    _last_capture_allocations = stats["allocations"]
+    logger.info(
+        f"截图缓冲区: 分配 {stats['allocations']} 次"
+        f"（{stats['allocated_bytes'] / 1024**2:.1f} MB，最近新增 {new_allocations} 次），"
+        f"复用 {stats['reuses']} 次；进程内存 {rss / 1024**2:.1f} MB"
+    )
+    record_event(EVENT_CAPTURE_STATS, **stats, new_allocations=new_allocations, rss=rss)
 
-            stop_background()
-            if _window_manager:
-                _window_manager.stop()
-            break
 
-        if _stop_event.wait(MONITOR_THREAD_CHECK_INTERVAL):
-            break
+def check_stop_file():
+    """检查停止文件，触发安全退出（由调度器定期执行）"""
+    if not _running or not os.path.exists(STOP_FILE):
+        return
+
+    logger.info("检测到停止文件，正在退出...")
+    try:
+        os.remove(STOP_FILE)
+    except Exception as e:
+        logger.warning(f"删除停止文件失败: {e}")
+
+    stop_background()
+    if _window_manager:
+        _window_manager.stop()
 
 
 def stop_background():
@@ -117,12 +216,32 @@ def stop_background():
     if not _running:
         return
     _running = False
-    _stop_event.set()
     for monitor in _service_monitors:
         monitor.stop()
+    if _recycle_manager is not None:
+        _recycle_manager.stop()
+    if _popup_sentinel is not None:
+        _popup_sentinel.stop()
+    if _exit_watcher is not None:
+        _exit_watcher.stop()
+    _scheduler.stop()
     logger.info("正在停止后台服务...")
 
 
+def show_console():
+    """显示控制台窗口并恢复控制台日志输出"""
+    set_console_logging(True)
+    return show_console_window()
+
+
+def hide_console():
+    """隐藏控制台窗口，隐藏期间不再向控制台输出日志"""
+    if hide_console_window():
+        set_console_logging(False)
+        return True
+    return False
+
+
 def cleanup():
     """程序退出时的清理函数"""
     global _window_manager
@@ -130,6 +249,9 @@ def cleanup():
     if _window_manager:
         _window_manager.stop()
     logger.info("Diablo III 自动启动器已停止。")
+    # 最后写完队列中剩余的事件和日志
+    shutdown_event_log()
+    shutdown_logging()
 
 
 # 注册退出时的清理函数
@@ -143,22 +265,30 @@ def main():
     logger.info(f"{APP_NAME} 已启动")
     logger.info("程序将在后台运行，所有日志将保存到日志文件中")
 
+    # 预先加载模板包，避免每次查找图片时重复解码
+    preload_templates()
+
     # 初始化窗口管理器
     _window_manager = WindowManager(
         on_quit_callback=stop_background,
-        on_show_console=show_console_window,
-        on_hide_console=hide_console_window,
+        on_show_console=show_console,
+        on_hide_console=hide_console,
+        status_provider=get_service_status,
+        log_file=log_file,
+        log_handler=get_gui_log_handler(),
+    )
+
+    # 启动停止文件监控
+    _scheduler.add_job(
+        "StopFileWatcher", check_stop_file, MONITOR_THREAD_CHECK_INTERVAL
     )
+    _scheduler.add_job("CaptureStats", log_capture_stats, CAPTURE_STATS_INTERVAL)
 
     # 启动后台监控
     start_service_monitors()
 
-    # 启动停止文件监控
-    stop_file_thread = threading.Thread(target=stop_file_watcher, daemon=True)
-    stop_file_thread.start()
-
     # 隐藏控制台窗口
-    if hide_console_window():
+    if hide_console():
         logger.info("控制台窗口已隐藏，程序在后台运行")
 
     try:
@@ -174,8 +304,6 @@ def main():
         stop_background()
         if _window_manager:
             _window_manager.stop()
-        # 等待线程结束
-        stop_file_thread.join(timeout=5)
         logger.info("程序已退出")
 
 
@@ -0,0 +1,257 @@
+"""
+弹窗哨兵模块
+在独立线程中以较低频率检测 Battle.net 窗口内的登录和选项弹窗，出现后立即点击关闭；
+浏览器中的网易确认弹窗不在 Battle.net 窗口内，以更低的频率在整个屏幕中检测
+"""
+
+import logging
+import threading
+import time
+
+import pyautogui
+
+from config import (
+    BATTLE_NET_PROCESS_NAME,
+    D3_PROCESS_NAME,
+    BATTLE_NET_OPTION_IMAGE,
+    BATTLE_NET_LOGIN_IMAGE,
+    NETEASE_SUBMIT_IMAGE,
+    IMAGE_SEARCH_CONFIDENCE,
+    FRAME_CHANGE_TILE_SIZE,
+    FRAME_CHANGE_TOLERANCE,
+    POPUP_SENTINEL_INTERVAL,
+    POPUP_SENTINEL_MAX_INTERVAL,
+    POPUP_SENTINEL_IDLE_INTERVAL,
+    POPUP_SENTINEL_BROWSER_INTERVAL,
+    POPUP_SENTINEL_BACKOFF,
+    POPUP_SENTINEL_FRESH_AGE,
+)
+from frame_change import TileChangeDetector
+from image_finder import (
+    grab_shared,
+    find_images,
+    click_match,
+    input_lock,
+    resolve_search_region,
+)
+from process_manager import (
+    is_process_running,
+    find_process_window,
+    is_process_foreground,
+)
+from template_registry import get_template
+
+logger = logging.getLogger()
+
+# Battle.net 窗口内的弹窗，按点击顺序排列：单选按钮、确认按钮
+POPUP_TARGETS = [
+    (BATTLE_NET_OPTION_IMAGE, "单选按钮"),
+    (BATTLE_NET_LOGIN_IMAGE, "确认按钮"),
+]
+
+# 浏览器中的弹窗，位置不固定，在整个屏幕中查找
+BROWSER_POPUP_TARGETS = [
+    (NETEASE_SUBMIT_IMAGE, "浏览器中的'确定'按钮"),
+]
+
+_active_sentinel = None
+
+
+def is_sentinel_active(max_age=POPUP_SENTINEL_FRESH_AGE):
+    """
+    弹窗哨兵是否在 max_age 秒内完成过一次 Battle.net 窗口扫描
+    （启动流程据此跳过自己的弹窗检查；哨兵空闲退避或未能扫描时流程照常处理）
+    """
+    sentinel = _active_sentinel
+    if sentinel is None:
+        return False
+    age = sentinel.last_scan_age()
+    return age is not None and age <= max_age
+
+
+class PopupSentinel:
+    """在独立线程中周期截取 Battle.net 窗口（以及低频截取整个屏幕），画面变化时才匹配弹窗模板"""
+
+    def __init__(
+        self,
+        targets=POPUP_TARGETS,
+        browser_targets=BROWSER_POPUP_TARGETS,
+        interval=POPUP_SENTINEL_INTERVAL,
+        max_interval=POPUP_SENTINEL_MAX_INTERVAL,
+        idle_interval=POPUP_SENTINEL_IDLE_INTERVAL,
+        browser_interval=POPUP_SENTINEL_BROWSER_INTERVAL,
+        confidence=IMAGE_SEARCH_CONFIDENCE,
+    ):
+        """
+        参数:
+            targets: Battle.net 窗口内的弹窗 [(图片路径, 描述), ...]，同一帧找到多个时按列表顺序点击
+            browser_targets: 在整个屏幕中查找的浏览器弹窗 [(图片路径, 描述), ...]
+            interval: 检测间隔（秒）
+            max_interval: 窗口存在但连续未发现弹窗时间隔逐步延长到的上限（秒），不应超过1秒
+            idle_interval: 无需扫描（Battle.net 未运行、没有窗口或游戏在前台）时的检测间隔（秒）
+            browser_interval: 在整个屏幕中查找浏览器弹窗的间隔（秒）
+            confidence: 匹配置信度
+        """
+        self._targets = list(targets)
+        self._browser_targets = list(browser_targets)
+        self._interval = interval
+        self._max_interval = max_interval
+        self._idle_interval = idle_interval
+        self._browser_interval = browser_interval
+        self._current_interval = interval
+        self._confidence = confidence
+        self._detector = TileChangeDetector(
+            FRAME_CHANGE_TILE_SIZE, FRAME_CHANGE_TOLERANCE
+        )
+        self._browser_detector = TileChangeDetector(
+            FRAME_CHANGE_TILE_SIZE, FRAME_CHANGE_TOLERANCE
+        )
+        self._templates = None
+        self._browser_templates = None
+        self._next_browser_scan = 0
+        self._hwnd = None
+        self._last_scan = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        global _active_sentinel
+        if self._thread is not None:
+            return
+        self._templates = self._load_templates(self._targets)
+        self._browser_templates = self._load_templates(self._browser_targets)
+        if not self._templates and not self._browser_templates:
+            logger.warning("没有可用的弹窗图片，弹窗哨兵未启动")
+            return
+        # 使用独立线程，不与重启任务争用调度器的工作线程
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="PopupSentinel", daemon=True
+        )
+        self._thread.start()
+        _active_sentinel = self
+        logger.info("弹窗哨兵已启动")
+
+    def stop(self):
+        global _active_sentinel
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        if _active_sentinel is self:
+            _active_sentinel = None
+        logger.info("弹窗哨兵已停止")
+
+    @staticmethod
+    def _load_templates(targets):
+        templates = {}
+        for img_path, description in targets:
+            try:
+                templates[img_path] = get_template(img_path)
+            except Exception as e:
+                logger.error(f"读取{description}的图片 {img_path} 失败: {e}")
+        return templates
+
+    def last_scan_age(self):
+        """距上一次完成扫描的秒数，从未扫描时返回None"""
+        last_scan = self._last_scan
+        if last_scan is None:
+            return None
+        return time.monotonic() - last_scan
+
+    def _run(self):
+        while not self._stop_event.wait(self._current_interval):
+            try:
+                self._tick()
+            except Exception as e:
+                self._detector.reset()
+                self._browser_detector.reset()
+                logger.error(f"弹窗哨兵检测出错: {e}")
+
+    def _idle(self):
+        """无需扫描时按空闲间隔检查，窗口重新出现后恢复正常间隔"""
+        self._hwnd = None
+        self._detector.reset()
+        self._current_interval = self._idle_interval
+
+    def _tick(self):
+        # 弹窗只会在 Battle.net 运行时出现；游戏在前台时无需检测
+        if not is_process_running(BATTLE_NET_PROCESS_NAME) or is_process_foreground(
+            D3_PROCESS_NAME
+        ):
+            self._browser_detector.reset()
+            self._idle()
+            return
+        self._scan_browser()
+        hwnd = find_process_window(BATTLE_NET_PROCESS_NAME)
+        if not hwnd or not self._templates:
+            self._idle()
+            if self._browser_templates:
+                self._current_interval = min(
+                    self._current_interval, self._browser_interval
+                )
+            return
+        if hwnd != self._hwnd:
+            self._hwnd = hwnd
+            self._detector.reset()
+            self._current_interval = self._interval
+
+        # 窗口矩形无效（如最小化）时不退回全屏匹配
+        region = resolve_search_region(hwnd=hwnd)
+        found = region is not None and self._scan(
+            region, self._templates, self._targets, self._detector
+        )
+        self._last_scan = time.monotonic()
+        if found:
+            self._current_interval = self._interval
+        else:
+            self._current_interval = min(
+                self._current_interval * POPUP_SENTINEL_BACKOFF, self._max_interval
+            )
+
+    def _scan_browser(self):
+        """每 browser_interval 秒在整个屏幕中查找一次浏览器弹窗"""
+        now = time.monotonic()
+        if not self._browser_templates or now < self._next_browser_scan:
+            return
+        self._next_browser_scan = now + self._browser_interval
+        self._scan(
+            None,
+            self._browser_templates,
+            self._browser_targets,
+            self._browser_detector,
+        )
+
+    def _scan(self, region, templates, targets, detector):
+        """
+        截取区域并在画面变化处匹配，找到弹窗时依次点击
+
+        参数:
+            region: 屏幕区域 (left, top, width, height)，None表示整个屏幕
+            templates: {图片路径: TemplateImage}
+            targets: [(图片路径, 描述), ...]，决定点击顺序
+            detector: 该区域对应的 TileChangeDetector
+
+        返回:
+            bool: 是否点击了弹窗
+        """
+        started = time.monotonic()
+        screenshot, region = grab_shared(region, max_age=self._interval)
+        changed = detector.update(screenshot)
+        if changed is None:
+            return False
+        found = find_images(templates, screenshot, self._confidence, changed=changed)
+        if not found:
+            return False
+
+        with input_lock:
+            original_pos = pyautogui.position()
+            for img_path, description in targets:
+                if img_path in found:
+                    click_match(found[img_path], region, img_path, started)
+                    logger.info(f"弹窗哨兵已点击{description}。")
+            pyautogui.moveTo(original_pos)
+        # 点击后重新完整匹配一次，弹窗未关闭时下次仍能发现
+        detector.reset()
+        return True
@@ -12,25 +12,20 @@ import win32con
 import win32gui
 import win32process
 
+from process_snapshot import get_snapshot, invalidate_snapshot
+from process_tracker import get_tracker
+from window_index import get_window_index
+
 logger = logging.getLogger()
 ASFW_ANY = -1
+DEFAULT_DPI = 96
+WINDOW_RESPONSE_TIMEOUT_MS = 1000
 
 
 def _iter_process_infos(process_name):
-    """枚举与给定名称匹配的所有进程信息"""
-    target_name = process_name.lower()
-    for proc in psutil.process_iter(["pid", "name", "exe"]):
-        try:
-            name = proc.info.get("name")
-            if name and name.lower() == target_name:
-                yield proc.info
-        except (psutil.AccessDenied, psutil.NoSuchProcess):
-            continue
-
-
-def _get_process_info(process_name):
-    """获取匹配的第一个进程信息"""
-    return next(_iter_process_infos(process_name), None)
+    """枚举与给定名称匹配的所有进程信息（来自共享的进程快照）"""
+    for pid in get_snapshot().pids(process_name):
+        yield {"pid": pid, "name": process_name}
 
 
 def is_process_running(process_name):
@@ -44,33 +39,29 @@ def is_process_running(process_name):
         bool: 进程正在运行返回True，否则返回False
     """
     try:
-        return _get_process_info(process_name) is not None
+        return get_tracker().is_running(process_name)
     except Exception as e:
         logger.error(f"检查进程 {process_name} 时出错: {e}")
         return False
 
 
-def _find_window_for_pid(pid, title_hint=None):
-    """在窗口列表中查找指定PID的窗口"""
-    matches = []
-    title_hint_lower = title_hint.lower() if title_hint else None
+def get_tracked_pid(process_name):
+    """
+    获取正在跟踪的进程PID（不扫描进程表）
 
-    def enum_callback(hwnd, matched_hwnds):
-        try:
-            if not win32gui.IsWindowVisible(hwnd):
-                return
-            _, window_pid = win32process.GetWindowThreadProcessId(hwnd)
-            if window_pid != pid:
-                return
-            title = win32gui.GetWindowText(hwnd)
-            if title_hint_lower and title_hint_lower not in title.lower():
-                return
-            matched_hwnds.append(hwnd)
-        except Exception:
-            pass
-
-    win32gui.EnumWindows(enum_callback, matches)
-    return matches[0] if matches else None
+    参数:
+        process_name: 进程名称
+
+    返回:
+        int: PID，未跟踪时返回None
+    """
+    return get_tracker().tracked_pid(process_name)
+
+
+def _find_window_for_pid(pid, title_hint=None):
+    """在窗口索引中查找指定PID的可见窗口"""
+    windows = get_window_index().windows_for_pid(pid, title_hint)
+    return windows[0].hwnd if windows else None
 
 
 def _set_foreground_window(hwnd):
@@ -120,7 +111,6 @@ def find_window_by_title(part_title, process_name=None):
         tuple: (left, top, width, height) 或 None
     """
     try:
-        title_filter = part_title.lower() if part_title else None
         hwnd = None
         if process_name:
             process_found = False
@@ -133,25 +123,10 @@ def find_window_by_title(part_title, process_name=None):
                 return None
 
         if hwnd is None:
-            results = []
-
-            def enum_callback(hwnd, results):
-                try:
-                    if not win32gui.IsWindowVisible(hwnd):
-                        return
-                    title = win32gui.GetWindowText(hwnd)
-                    if title_filter is None:
-                        results.append(hwnd)
-                        return
-                    if title and title_filter in title.lower():
-                        results.append(hwnd)
-                except Exception:
-                    pass
-
-            win32gui.EnumWindows(enum_callback, results)
-            if not results:
+            windows = get_window_index().find_by_title(part_title)
+            if not windows:
                 return None
-            hwnd = results[0]
+            hwnd = windows[0].hwnd
 
         _set_foreground_window(hwnd)
         time.sleep(0.2)
@@ -162,6 +137,111 @@ def find_window_by_title(part_title, process_name=None):
         return None
 
 
+def find_process_window(process_name, title_hint=None):
+    """
+    查找指定进程所属的可见窗口（不激活）
+
+    参数:
+        process_name: 进程名称
+        title_hint: 可选窗口标题关键字
+
+    返回:
+        int: 窗口句柄或 None
+    """
+    for process_info in _iter_process_infos(process_name):
+        hwnd = _find_window_for_pid(process_info["pid"], title_hint)
+        if hwnd:
+            return hwnd
+    return None
+
+
+def get_window_rect(hwnd):
+    """
+    获取窗口在屏幕上的位置和大小
+
+    参数:
+        hwnd: 窗口句柄
+
+    返回:
+        tuple: (left, top, width, height)
+    """
+    left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+    return (left, top, right - left, bottom - top)
+
+
+def get_window_dpi(hwnd):
+    """
+    获取窗口所在显示器的DPI
+
+    参数:
+        hwnd: 窗口句柄
+
+    返回:
+        int: DPI，系统不支持时返回默认的96
+    """
+    try:
+        dpi = ctypes.windll.user32.GetDpiForWindow(hwnd)
+        return dpi or DEFAULT_DPI
+    except Exception:
+        return DEFAULT_DPI
+
+
+def is_window_responding(hwnd, timeout_ms=WINDOW_RESPONSE_TIMEOUT_MS):
+    """
+    检查窗口是否在响应消息
+
+    参数:
+        hwnd: 窗口句柄
+        timeout_ms: 等待窗口处理消息的最长时间（毫秒）
+
+    返回:
+        bool: 窗口在超时前处理了消息返回True
+    """
+    try:
+        win32gui.SendMessageTimeout(
+            hwnd, win32con.WM_NULL, 0, 0, win32con.SMTO_ABORTIFHUNG, timeout_ms
+        )
+        return True
+    except Exception:
+        return False
+
+
+def is_window_hung(hwnd):
+    """
+    检查窗口是否处于"未响应"状态（不向窗口发送消息，开销很小）
+
+    参数:
+        hwnd: 窗口句柄
+
+    返回:
+        bool: 系统认为窗口未响应返回True
+    """
+    try:
+        return bool(ctypes.windll.user32.IsHungAppWindow(hwnd))
+    except Exception:
+        return False
+
+
+def is_process_foreground(process_name):
+    """
+    检查前台窗口是否属于指定进程
+
+    参数:
+        process_name: 进程名称
+
+    返回:
+        bool: 前台窗口属于该进程返回True
+    """
+    try:
+        hwnd = win32gui.GetForegroundWindow()
+        if not hwnd:
+            return False
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+    except Exception:
+        return False
+    return pid in get_snapshot().pids(process_name)
+
+
 def focus_process_window(process_name, title_hint=None):
     """
     查找并激活指定进程所属窗口
@@ -174,17 +254,13 @@ def focus_process_window(process_name, title_hint=None):
         tuple: (left, top, width, height) 或 None
     """
     try:
-        for process_info in _iter_process_infos(process_name):
-            hwnd = _find_window_for_pid(process_info["pid"], title_hint)
-            if hwnd:
-                break
-        else:
+        hwnd = find_process_window(process_name, title_hint)
+        if not hwnd:
             return None
 
         _set_foreground_window(hwnd)
         time.sleep(0.2)
-        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-        return (left, top, right - left, bottom - top)
+        return get_window_rect(hwnd)
     except Exception as e:
         logger.error(f"激活进程 {process_name} 窗口时出错: {e}")
         return None
@@ -202,12 +278,10 @@ def terminate_process(process_name, wait_timeout=5):
         bool: 成功请求终止返回True，否则返回False
     """
     processes = []
-    target_name = process_name.lower()
-    for proc in psutil.process_iter(["pid", "name"]):
+    # 终止前强制刷新快照，避免针对已经退出的旧PID操作
+    for pid in get_snapshot(max_age=0).pids(process_name):
         try:
-            name = proc.info.get("name")
-            if name and name.lower() == target_name:
-                processes.append(proc)
+            processes.append(psutil.Process(pid))
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
 
@@ -233,4 +307,6 @@ def terminate_process(process_name, wait_timeout=5):
             logger.error(f"强制结束进程 {process_name} ({proc.pid}) 超时")
             success = False
 
+    invalidate_snapshot()
+    get_tracker().forget(process_name)
     return success
@@ -0,0 +1,88 @@
+"""
+进程快照模块
+一次枚举系统进程并建立 名称→PID 索引，供所有监控线程共享
+"""
+
+import logging
+import threading
+import time
+
+import psutil
+
+from config import PROCESS_SNAPSHOT_MAX_AGE
+
+logger = logging.getLogger()
+
+
+class ProcessSnapshot:
+    """某一时刻的进程表，只保存名称（小写）到PID列表的索引"""
+
+    def __init__(self, pids_by_name, taken_at):
+        self.pids_by_name = pids_by_name
+        self.taken_at = taken_at
+
+    def pids(self, process_name):
+        """返回指定名称的所有PID（不区分大小写）"""
+        return self.pids_by_name.get(process_name.lower(), [])
+
+    def __contains__(self, process_name):
+        return bool(self.pids(process_name))
+
+
+def scan_processes():
+    """枚举系统进程，只读取名称"""
+    pids_by_name = {}
+    for proc in psutil.process_iter(["name"]):
+        try:
+            name = proc.info.get("name")
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
+            continue
+        if name:
+            pids_by_name.setdefault(name.lower(), []).append(proc.pid)
+    return ProcessSnapshot(pids_by_name, time.monotonic())
+
+
+class ProcessSnapshotService:
+    """按时间复用进程快照，过期后由第一个调用者重新扫描，其余调用者等待结果"""
+
+    def __init__(self, max_age=PROCESS_SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self.scan_count = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self, max_age=None):
+        """
+        获取进程快照
+
+        参数:
+            max_age: 可接受的快照最大年龄（秒），默认使用服务配置；0表示强制重新扫描
+
+        返回:
+            ProcessSnapshot
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.taken_at >= max_age:
+                snapshot = self._snapshot = scan_processes()
+                self.scan_count += 1
+            return snapshot
+
+    def invalidate(self):
+        """丢弃当前快照（例如刚启动或结束了进程）"""
+        with self._lock:
+            self._snapshot = None
+
+
+_service = ProcessSnapshotService()
+
+
+def get_snapshot(max_age=None):
+    """获取共享的进程快照"""
+    return _service.get(max_age)
+
+
+def invalidate_snapshot():
+    """使共享的进程快照失效"""
+    _service.invalidate()
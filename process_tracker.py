@@ -0,0 +1,139 @@
+"""
+进程跟踪模块
+记录已发现进程的PID与创建时间，存活检查直接探测该PID，无需扫描整个进程表
+"""
+
+import json
+import logging
+import os
+import threading
+
+import psutil
+
+from config import PROCESS_STATE_FILE
+from process_snapshot import get_snapshot
+
+logger = logging.getLogger()
+
+
+class ProcessTracker:
+    """按进程名称跟踪 (pid, create_time)，并持久化到状态文件以便重启后直接接管"""
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._tracked = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                self._tracked = json.load(f)
+            logger.info(f"已从状态文件恢复 {len(self._tracked)} 个跟踪进程")
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取进程状态文件 {self.state_file} 失败: {e}")
+            self._tracked = {}
+
+    def _save(self):
+        """写入临时文件后原子替换"""
+        tmp_path = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._tracked, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"保存进程状态文件 {self.state_file} 失败: {e}")
+
+    @staticmethod
+    def _alive(process):
+        """已退出但句柄尚未释放（Windows）或僵尸状态（Linux）的进程不算存活"""
+        if not psutil.pid_exists(process.pid):
+            return False
+        try:
+            return process.status() != psutil.STATUS_ZOMBIE
+        except psutil.AccessDenied:
+            return True
+
+    @classmethod
+    def _probe(cls, entry):
+        """直接探测记录的PID，创建时间不一致说明PID已被其他进程复用"""
+        try:
+            process = psutil.Process(entry["pid"])
+            return process.create_time() == entry["create_time"] and cls._alive(process)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def track(self, process_name, pid):
+        """
+        开始跟踪指定进程
+
+        返回:
+            bool: 进程存在并已记录返回True
+        """
+        try:
+            process = psutil.Process(pid)
+            create_time = process.create_time()
+            if not self._alive(process):
+                return False
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        with self._lock:
+            self._tracked[process_name.lower()] = {
+                "pid": pid,
+                "create_time": create_time,
+            }
+            self._save()
+        return True
+
+    def forget(self, process_name):
+        """停止跟踪指定进程"""
+        with self._lock:
+            if self._tracked.pop(process_name.lower(), None) is not None:
+                self._save()
+
+    def tracked_pid(self, process_name):
+        """返回正在跟踪的PID，未跟踪时返回None"""
+        with self._lock:
+            entry = self._tracked.get(process_name.lower())
+            return entry["pid"] if entry else None
+
+    def is_running(self, process_name):
+        """
+        检查进程是否存活：先探测已跟踪的PID，失效时才扫描进程表重新发现
+
+        参数:
+            process_name: 进程名称
+
+        返回:
+            bool: 进程正在运行返回True
+        """
+        key = process_name.lower()
+        # 查找和校验创建时间都在锁内完成，避免读到其他线程正在替换的记录
+        with self._lock:
+            entry = self._tracked.get(key)
+            if entry is not None:
+                if self._probe(entry):
+                    return True
+                del self._tracked[key]
+                self._save()
+
+        for pid in get_snapshot().pids(process_name):
+            if self.track(process_name, pid):
+                return True
+        return False
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """获取全局进程跟踪器（首次调用时从状态文件恢复）"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = ProcessTracker(PROCESS_STATE_FILE)
+    return _tracker
@@ -0,0 +1,127 @@
+"""
+就绪探测模块
+启动服务后按阶段轮询探测（进程存在、窗口可见、窗口响应、模板可见），
+服务就绪立即返回，取代固定的启动等待时间
+"""
+
+import logging
+import time
+
+from config import (
+    IMAGE_SEARCH_CONFIDENCE,
+    READINESS_POLL_MIN_INTERVAL,
+    READINESS_POLL_MAX_INTERVAL,
+)
+from process_manager import (
+    is_process_running,
+    find_process_window,
+    is_window_responding,
+)
+
+logger = logging.getLogger()
+
+# 每次探测未通过后轮询间隔的增长倍数
+POLL_BACKOFF = 1.5
+
+
+class Probe:
+    """就绪探测项"""
+
+    def __init__(self, description, check_func):
+        self.description = description
+        self._check_func = check_func
+
+    def check(self):
+        """探测一次，出错视为未就绪"""
+        try:
+            return bool(self._check_func())
+        except Exception as e:
+            logger.debug(f"探测 {self.description} 时出错: {e}")
+            return False
+
+
+def process_exists(process_name):
+    """进程已存在"""
+    return Probe(f"{process_name} 进程", lambda: is_process_running(process_name))
+
+
+def window_visible(process_name, title_hint=None):
+    """进程的顶层窗口已显示"""
+    return Probe(
+        f"{process_name} 窗口",
+        lambda: find_process_window(process_name, title_hint) is not None,
+    )
+
+
+def window_responding(process_name, title_hint=None):
+    """进程的窗口已能响应消息"""
+
+    def _check():
+        hwnd = find_process_window(process_name, title_hint)
+        return hwnd is not None and is_window_responding(hwnd)
+
+    return Probe(f"{process_name} 窗口响应", _check)
+
+
+def template_visible(
+    image_path,
+    process_name=None,
+    title_hint=None,
+    confidence=IMAGE_SEARCH_CONFIDENCE,
+):
+    """模板图片已出现在屏幕（或进程窗口）上"""
+
+    def _check():
+        # 延迟导入，避免只使用进程探测时初始化截图后端
+        from image_finder import locate_image
+
+        found = locate_image(
+            image_path, confidence, process_name=process_name, title_hint=title_hint
+        )
+        return found is not None
+
+    return Probe(f"图片 {image_path}", _check)
+
+
+def wait_until_ready(
+    probes,
+    timeout,
+    description="",
+    min_interval=READINESS_POLL_MIN_INTERVAL,
+    max_interval=READINESS_POLL_MAX_INTERVAL,
+):
+    """
+    依次等待各探测项通过
+
+    每个阶段先以min_interval快速轮询，未通过时间隔逐步增长到max_interval；
+    进入下一阶段时间隔重新从min_interval开始
+
+    参数:
+        probes: 探测项列表，按顺序通过
+        timeout: 所有阶段的总期限（秒）
+        description: 描述信息，用于日志输出
+        min_interval: 最短轮询间隔（秒）
+        max_interval: 最长轮询间隔（秒）
+
+    返回:
+        bool: 期限内全部通过返回True
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    for probe in probes:
+        stage_start = time.monotonic()
+        interval = min_interval
+        while not probe.check():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(
+                    f"{description} 在 {timeout} 秒内未就绪（等待{probe.description}）"
+                )
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, max_interval)
+        logger.debug(
+            f"{description} {probe.description}就绪，用时 {time.monotonic() - stage_start:.2f} 秒"
+        )
+    logger.info(f"{description} 已就绪，用时 {time.monotonic() - start:.2f} 秒")
+    return True
@@ -0,0 +1,220 @@
+"""
+资源泄漏监控模块
+定期采样各进程的内存（RSS）、句柄数和线程数，拟合增长趋势；
+预计将超过上限或进入维护时间段时，按顺序计划重启全部服务
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+import numpy as np
+import psutil
+
+from config import (
+    RESOURCE_SAMPLE_INTERVAL,
+    RESOURCE_SAMPLE_WINDOW,
+    RESOURCE_MIN_SAMPLES,
+    RESOURCE_PROJECTION_HORIZON,
+    RECYCLE_MAINTENANCE_WINDOW,
+    RECYCLE_MIN_INTERVAL,
+)
+from process_manager import get_tracked_pid
+from ring_buffer import RingBuffer
+
+logger = logging.getLogger()
+
+METRICS = ("rss", "handles", "threads")
+
+
+class ResourceTracker:
+    """单个进程的资源采样序列"""
+
+    def __init__(self, process_name, limits, capacity=RESOURCE_SAMPLE_WINDOW):
+        """
+        参数:
+            process_name: 进程名称
+            limits: {指标名: 上限}，指标为 rss（字节）、handles、threads
+            capacity: 保留的采样数
+        """
+        self.process_name = process_name
+        self.limits = dict(limits)
+        self._times = RingBuffer(capacity)
+        self._series = {metric: RingBuffer(capacity) for metric in METRICS}
+        self._pid = None
+
+    def reset(self):
+        self._times.clear()
+        for series in self._series.values():
+            series.clear()
+        self._pid = None
+
+    def sample(self):
+        """采样一次，进程变化（重启）后重新开始记录"""
+        pid = get_tracked_pid(self.process_name)
+        if pid is None:
+            self.reset()
+            return
+        if pid != self._pid:
+            self.reset()
+            self._pid = pid
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                rss = process.memory_info().rss
+                threads = process.num_threads()
+                # 句柄数只在 Windows 上可用
+                handles = (
+                    process.num_handles() if hasattr(process, "num_handles") else 0
+                )
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.debug(f"采样 {self.process_name} 资源失败: {e}")
+            self.reset()
+            return
+        self._times.append(time.monotonic())
+        self._series["rss"].append(rss)
+        self._series["handles"].append(handles)
+        self._series["threads"].append(threads)
+
+    def projected_breach(self, horizon=RESOURCE_PROJECTION_HORIZON):
+        """
+        按线性趋势判断 horizon 秒内是否会超过上限
+
+        返回:
+            str: 超限原因；不会超限或采样不足时返回None
+        """
+        if len(self._times) < RESOURCE_MIN_SAMPLES:
+            return None
+        times = self._times.values()
+        times -= times[-1]
+        for metric, limit in self.limits.items():
+            values = self._series[metric].values()
+            if values[-1] >= limit:
+                return f"{metric} 已达 {values[-1]:.0f}（上限 {limit}）"
+            slope, intercept = np.polyfit(times, values, 1)
+            if slope <= 0:
+                continue
+            projected = intercept + slope * horizon
+            if projected >= limit:
+                return (
+                    f"{metric} 预计 {horizon / 60:.0f} 分钟内达到 {projected:.0f}"
+                    f"（上限 {limit}）"
+                )
+        return None
+
+
+def _in_maintenance_window(now, window):
+    """window 为 ("HH:MM", "HH:MM")，支持跨越午夜"""
+    start, end = (datetime.time.fromisoformat(t) for t in window)
+    current = now.time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+class RecycleManager:
+    """在共享调度器上采样资源，需要时暂停监控并计划重启全部服务"""
+
+    def __init__(
+        self,
+        scheduler,
+        trackers,
+        recycle_func,
+        monitors=(),
+        interval=RESOURCE_SAMPLE_INTERVAL,
+        maintenance_window=RECYCLE_MAINTENANCE_WINDOW,
+        min_interval=RECYCLE_MIN_INTERVAL,
+    ):
+        """
+        参数:
+            scheduler: 共享调度器
+            trackers: ResourceTracker 列表
+            recycle_func: 按顺序重启全部服务的函数，返回bool
+            monitors: 重启期间需要暂停的 ServiceMonitor
+            interval: 采样间隔（秒）
+            maintenance_window: 维护时间段 ("HH:MM", "HH:MM")，None表示不定时重启
+            min_interval: 两次计划重启的最短间隔（秒），程序启动后的第一次不受限制
+        """
+        self._scheduler = scheduler
+        self._trackers = list(trackers)
+        self._recycle_func = recycle_func
+        self._monitors = list(monitors)
+        self._interval = interval
+        self._maintenance_window = maintenance_window
+        self._min_interval = min_interval
+        # 只在实际执行过计划重启后才限制最短间隔
+        self._last_recycle = None
+        self._job = None
+        self._recycle_future = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._job is not None:
+            return
+        self._job = self._scheduler.add_job(
+            "ResourceMonitor", self._tick, self._interval
+        )
+        logger.info("资源监控已启动")
+
+    def stop(self):
+        if self._job is None:
+            return
+        self._job.cancel()
+        self._job = None
+        logger.info("资源监控已停止")
+
+    def _recycle_reason(self):
+        for tracker in self._trackers:
+            reason = tracker.projected_breach()
+            if reason:
+                return f"{tracker.process_name} {reason}"
+        if self._maintenance_window and _in_maintenance_window(
+            datetime.datetime.now(), self._maintenance_window
+        ):
+            return "进入维护时间段"
+        return None
+
+    def _tick(self):
+        with self._lock:
+            if self._recycle_future is not None and not self._recycle_future.done():
+                return
+
+        for tracker in self._trackers:
+            tracker.sample()
+
+        if (
+            self._last_recycle is not None
+            and time.monotonic() - self._last_recycle < self._min_interval
+        ):
+            return
+        reason = self._recycle_reason()
+        if reason is None:
+            return
+
+        logger.warning(f"{reason}，开始计划重启全部服务")
+        self._last_recycle = time.monotonic()
+        with self._lock:
+            self._recycle_future = self._scheduler.submit(self._recycle)
+
+    def _recycle(self):
+        start = time.monotonic()
+        for monitor in self._monitors:
+            monitor.pause()
+        try:
+            succeeded = self._recycle_func()
+        except Exception as e:
+            logger.error(f"计划重启出错: {e}", exc_info=True)
+            succeeded = False
+        finally:
+            for tracker in self._trackers:
+                tracker.reset()
+            for monitor in self._monitors:
+                monitor.resume()
+        elapsed = time.monotonic() - start
+        if succeeded:
+            logger.info(f"计划重启完成，用时 {elapsed:.1f} 秒")
+        else:
+            logger.error(
+                f"计划重启未能恢复全部服务（用时 {elapsed:.1f} 秒），交由监控继续恢复"
+            )
@@ -0,0 +1,142 @@
+"""
+服务依赖图模块
+按依赖关系（如 Battle.net → Diablo III → ROS-BOT）的拓扑顺序恢复服务，
+同一服务的并发重启请求合并为一次启动
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+
+class ServiceNode:
+    """依赖图中的一个服务"""
+
+    def __init__(self, name, check_func, launch_func, depends_on=()):
+        self.name = name
+        self.check_func = check_func
+        self.launch_func = launch_func
+        self.depends_on = list(depends_on)
+
+
+class RestartGraph:
+    """服务依赖图：恢复某个服务前先确保其依赖全部运行"""
+
+    def __init__(self):
+        self._nodes = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def add_service(self, name, check_func, launch_func, depends_on=()):
+        """
+        注册服务
+
+        参数:
+            name: 服务名称
+            check_func: 检查服务是否运行，返回bool
+            launch_func: 启动服务，返回bool
+            depends_on: 依赖的服务名称列表（需先注册）
+        """
+        for dependency in depends_on:
+            if dependency not in self._nodes:
+                raise ValueError(f"服务 {name} 依赖的 {dependency} 尚未注册")
+        self._nodes[name] = ServiceNode(name, check_func, launch_func, depends_on)
+        # 依赖项必须先注册，因此不会出现环；线程池大小随服务数量调整
+        self._executor = None
+
+    def topological_order(self):
+        """返回按依赖排序的服务名称（依赖在前）"""
+        order = []
+        visited = set()
+
+        def _visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+            for dependency in self._nodes[name].depends_on:
+                _visit(dependency)
+            order.append(name)
+
+        for name in self._nodes:
+            _visit(name)
+        return order
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # 每个服务最多同时占用一个线程，不会因互相等待而耗尽线程池
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(len(self._nodes), 1),
+                    thread_name_prefix="RestartGraph",
+                )
+            return self._executor
+
+    def ensure_running(self, name):
+        """服务正在运行时直接返回True，否则执行恢复"""
+        node = self._nodes[name]
+        try:
+            if node.check_func():
+                return True
+        except Exception as e:
+            logger.error(f"检查 {name} 状态时出错: {e}", exc_info=True)
+        return self.restart(name)
+
+    def restart(self, name):
+        """
+        恢复指定服务：依赖项先行（互不依赖的分支并行），再启动本服务
+
+        同一服务已有恢复在进行时，直接等待那一次的结果
+
+        参数:
+            name: 服务名称
+
+        返回:
+            bool: 服务恢复（或已在运行）返回True
+        """
+        with self._lock:
+            future = self._in_flight.get(name)
+            owner = future is None
+            if owner:
+                future = self._in_flight[name] = Future()
+
+        if not owner:
+            logger.info(f"{name} 已在恢复中，等待该次恢复结果...")
+            return future.result()
+
+        try:
+            result = self._recover(self._nodes[name])
+        except Exception as e:
+            logger.error(f"恢复 {name} 时出错: {e}", exc_info=True)
+            result = False
+        finally:
+            with self._lock:
+                del self._in_flight[name]
+        future.set_result(result)
+        return result
+
+    def _recover(self, node):
+        dependencies = node.depends_on
+        if len(dependencies) == 1:
+            results = [self.ensure_running(dependencies[0])]
+        else:
+            executor = self._get_executor()
+            futures = [executor.submit(self.ensure_running, d) for d in dependencies]
+            results = [f.result() for f in futures]
+
+        failed = [d for d, ok in zip(dependencies, results) if not ok]
+        if failed:
+            logger.error(f"{node.name} 的依赖 {', '.join(failed)} 未能恢复，跳过启动")
+            return False
+
+        # 等待依赖期间可能已被其他途径恢复
+        try:
+            if node.check_func():
+                logger.info(f"{node.name} 已在运行，无需重复启动")
+                return True
+        except Exception as e:
+            logger.error(f"检查 {node.name} 状态时出错: {e}", exc_info=True)
+
+        return bool(node.launch_func())
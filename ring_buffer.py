@@ -0,0 +1,44 @@
+"""
+环形缓冲区模块
+固定容量的数值序列，写满后覆盖最旧的数据，不随运行时间增长
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """基于 NumPy 数组的定长环形缓冲区"""
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def full(self):
+        return self._size == self.capacity
+
+    def append(self, value):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def values(self):
+        """按写入顺序（从旧到新）返回数据的副本"""
+        if self._size < self.capacity:
+            return self._data[: self._size].copy()
+        return np.roll(self._data, -self._next)
+
+    def last(self):
+        """最新写入的值，缓冲区为空时返回None"""
+        if not self._size:
+            return None
+        return self._data[self._next - 1].item()
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
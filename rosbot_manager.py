@@ -3,11 +3,16 @@ ROS-BOT 运行与启动管理模块
 提供检测和以管理员权限启动ROS-BOT的能力
 """
 
-import time
 import ctypes
 import logging
-from config import ROS_BOT_PROCESS_NAME, ROS_BOT_EXE_PATH, ROS_BOT_START_DELAY
+from config import ROS_BOT_PROCESS_NAME, ROS_BOT_EXE_PATH, ROS_BOT_READY_TIMEOUT
 from process_manager import is_process_running
+from readiness import (
+    wait_until_ready,
+    process_exists,
+    window_visible,
+    window_responding,
+)
 
 logger = logging.getLogger()
 
@@ -27,8 +32,17 @@ def launch_rosbot_admin():
         ret = ctypes.windll.shell32.ShellExecuteW(
             None, "runas", ROS_BOT_EXE_PATH, "", None, 1
         )
-        time.sleep(ROS_BOT_START_DELAY)
-        if is_rosbot_running():
+        # UAC确认和程序加载耗时不定，按就绪探测等待
+        ready = wait_until_ready(
+            [
+                process_exists(ROS_BOT_PROCESS_NAME),
+                window_visible(ROS_BOT_PROCESS_NAME),
+                window_responding(ROS_BOT_PROCESS_NAME),
+            ],
+            ROS_BOT_READY_TIMEOUT,
+            "ROS-BOT",
+        )
+        if ready or is_rosbot_running():
             logger.info("ROS-BOT 启动成功。")
             return True
         else:
@@ -0,0 +1,152 @@
+"""
+任务调度模块
+单线程堆定时队列按各自间隔执行检查任务，耗时操作交给小型工作线程池
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+
+class ScheduledJob:
+    """调度器中的周期任务"""
+
+    def __init__(self, scheduler, name, func, interval, jitter):
+        self.scheduler = scheduler
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.cancelled = False
+        self.run_count = 0
+        # 每次重新安排都会递增，堆中过期的条目据此跳过
+        self._generation = 0
+
+    def next_delay(self):
+        """下一次执行前的等待时间，加入随机抖动避免多个任务总在同一时刻执行"""
+        if not self.jitter:
+            return self.interval
+        spread = self.interval * self.jitter
+        return max(self.interval + random.uniform(-spread, spread), 0.0)
+
+    def trigger(self):
+        """立即执行一次（例如被监视的进程刚刚退出）"""
+        self.scheduler.reschedule(self, 0.0)
+
+    def cancel(self):
+        """取消任务"""
+        self.cancelled = True
+        self.scheduler.wake()
+
+
+class Scheduler:
+    """基于堆的单线程定时调度器"""
+
+    def __init__(self, workers=2, name="Scheduler"):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"{name}Worker"
+        )
+        self._started = False
+
+    def add_job(self, name, func, interval, jitter=0.0, initial_delay=None):
+        """
+        添加周期任务
+
+        参数:
+            name: 任务名称
+            func: 在调度线程上执行的函数，应当快速返回，耗时操作请用 submit
+            interval: 执行间隔（秒）
+            jitter: 间隔的随机抖动比例（如0.1表示±10%）
+            initial_delay: 首次执行前的等待时间，默认在 [0, interval*jitter] 内随机
+
+        返回:
+            ScheduledJob
+        """
+        job = ScheduledJob(self, name, func, interval, jitter)
+        if initial_delay is None:
+            initial_delay = random.uniform(0, interval * jitter) if jitter else 0.0
+        self.reschedule(job, initial_delay)
+        return job
+
+    def reschedule(self, job, delay):
+        """把任务安排在delay秒后执行，取代之前的安排"""
+        with self._condition:
+            if job.cancelled or self._stopped:
+                return
+            job._generation += 1
+            heapq.heappush(
+                self._heap,
+                (time.monotonic() + delay, next(self._counter), job._generation, job),
+            )
+            self._condition.notify()
+
+    def submit(self, func, *args, **kwargs):
+        """把耗时操作提交到工作线程池，返回 Future"""
+        return self._executor.submit(func, *args, **kwargs)
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify()
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """停止调度线程，并等待正在执行的工作线程任务结束"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._heap.clear()
+            self._condition.notify()
+        # 任务函数内部可能调用 stop，此时不能等待自身
+        if self._started and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _next_due_job(self):
+        """等待并取出下一个到期的任务，调度器停止时返回None"""
+        with self._condition:
+            while not self._stopped:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                due, _, generation, job = self._heap[0]
+                if job.cancelled or generation != job._generation:
+                    heapq.heappop(self._heap)
+                    continue
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                return job
+            return None
+
+    def _run(self):
+        while True:
+            job = self._next_due_job()
+            if job is None:
+                break
+            # 先安排下一次，任务执行期间调用 trigger 可以覆盖这次安排
+            self.reschedule(job, job.next_delay())
+            try:
+                job.func()
+                job.run_count += 1
+            except Exception as e:
+                logger.error(f"调度任务 {job.name} 执行出错: {e}", exc_info=True)
@@ -0,0 +1,385 @@
+"""
+屏幕截图模块
+提供统一的截图后端接口，截图直接写入可复用的灰度缓冲区
+"""
+
+import ctypes
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger()
+
+# FakeCaptureBackend 未指定画面时模拟的屏幕大小 (宽, 高)
+FAKE_SCREEN_SIZE = (640, 480)
+
+# 与PIL "L" 模式相同的ITU-R 601-2亮度系数
+_LUMA_R, _LUMA_G, _LUMA_B = 0.299, 0.587, 0.114
+
+
+class _ThreadBuffers:
+    """单个线程持有的缓冲区；account[0] 为其字节数，线程结束后由池扣除"""
+
+    def __init__(self):
+        self.buffers = OrderedDict()
+        self.account = [0]
+
+
+class FrameBufferPool:
+    """
+    按线程和尺寸复用的灰度缓冲区池，同一线程下一次截图会覆盖上一帧
+
+    线程结束时其缓冲区随线程局部数据一起释放，allocated_bytes 只统计仍存活的缓冲区
+    """
+
+    def __init__(self, dtype=np.float32, max_shapes=4):
+        """
+        参数:
+            dtype: 缓冲区数据类型
+            max_shapes: 每个线程每种用途最多保留的不同尺寸数量
+        """
+        self.dtype = dtype
+        self.max_shapes = max_shapes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+        self.allocated_bytes = 0
+
+    def acquire(self, shape, name="frame"):
+        """
+        获取当前线程指定尺寸的缓冲区
+
+        参数:
+            shape: 缓冲区形状
+            name: 缓冲区用途，同一线程可以同时持有不同用途的缓冲区
+
+        返回:
+            ndarray: 复用或新分配的缓冲区（内容未初始化）
+        """
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = self._local.state = _ThreadBuffers()
+            weakref.finalize(state, self._release_thread, state.account)
+        buffers, account = state.buffers, state.account
+        key = (name, tuple(shape))
+        buffer = buffers.get(key)
+        with self._lock:
+            if buffer is not None:
+                buffers.move_to_end(key)
+                self.reuses += 1
+                return buffer
+
+            # 区域尺寸不断变化时淘汰最久未用的缓冲区，避免内存累积
+            same_name = [k for k in buffers if k[0] == name]
+            while len(same_name) >= self.max_shapes:
+                nbytes = buffers.pop(same_name.pop(0)).nbytes
+                account[0] -= nbytes
+                self.allocated_bytes -= nbytes
+            buffer = buffers[key] = np.empty(shape, dtype=self.dtype)
+            self.allocations += 1
+            account[0] += buffer.nbytes
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def _release_thread(self, account):
+        """线程结束、其缓冲区被回收时扣除对应的字节数"""
+        with self._lock:
+            self.allocated_bytes -= account[0]
+            account[0] = 0
+
+    def stats(self):
+        """返回缓冲区分配统计"""
+        with self._lock:
+            return {
+                "allocations": self.allocations,
+                "reuses": self.reuses,
+                "allocated_bytes": self.allocated_bytes,
+            }
+
+
+class CaptureBackend:
+    """截图后端基类：grab 返回 float32 灰度数组（位于复用缓冲区中）"""
+
+    name = "base"
+
+    def __init__(self, pool=None):
+        self.pool = pool or FrameBufferPool()
+
+    def screen_rect(self):
+        """返回可截取的完整屏幕范围 (left, top, width, height)"""
+        raise NotImplementedError
+
+    def grab(self, region=None):
+        """
+        截取指定区域的灰度图
+
+        参数:
+            region: (left, top, width, height)，None表示完整屏幕
+
+        返回:
+            ndarray: 形状为 (height, width) 的float32数组，下次同线程截图时会被覆盖
+        """
+        raise NotImplementedError
+
+
+class PyAutoGuiCaptureBackend(CaptureBackend):
+    """通过 pyautogui 截图后转换到复用缓冲区，作为通用回退方案"""
+
+    name = "pyautogui"
+
+    def screen_rect(self):
+        import pyautogui
+
+        width, height = pyautogui.size()
+        return (0, 0, width, height)
+
+    def grab(self, region=None):
+        import pyautogui
+
+        region = region or self.screen_rect()
+        image = pyautogui.screenshot(region=region).convert("L")
+        out = self.pool.acquire((image.height, image.width))
+        np.copyto(out, np.asarray(image), casting="unsafe")
+        return out
+
+
+class _BitmapInfoHeader(ctypes.Structure):
+    _fields_ = [
+        ("biSize", ctypes.c_uint32),
+        ("biWidth", ctypes.c_int32),
+        ("biHeight", ctypes.c_int32),
+        ("biPlanes", ctypes.c_uint16),
+        ("biBitCount", ctypes.c_uint16),
+        ("biCompression", ctypes.c_uint32),
+        ("biSizeImage", ctypes.c_uint32),
+        ("biXPelsPerMeter", ctypes.c_int32),
+        ("biYPelsPerMeter", ctypes.c_int32),
+        ("biClrUsed", ctypes.c_uint32),
+        ("biClrImportant", ctypes.c_uint32),
+    ]
+
+
+def _delete_surface(gdi32, memory_dc, bitmap):
+    gdi32.DeleteObject(bitmap)
+    gdi32.DeleteDC(memory_dc)
+
+
+class _Surface:
+    """单个线程的内存DC与DIB Section，close() 或线程结束（对象被回收）时释放GDI对象"""
+
+    def __init__(self, gdi32, size, memory_dc, bitmap, pixels):
+        self.size = size
+        self.memory_dc = memory_dc
+        self.pixels = pixels
+        self._finalizer = weakref.finalize(
+            self, _delete_surface, gdi32, memory_dc, bitmap
+        )
+
+    def close(self):
+        self._finalizer()
+
+
+class Win32CaptureBackend(CaptureBackend):
+    """
+    GDI截图后端：BitBlt 到常驻的 DIB Section，NumPy 直接读取其像素内存
+
+    DIB Section 只在截图尺寸变化时重建，像素数据不经过额外复制；
+    每个线程各有一份，线程结束时自动释放，短生命周期的工作线程不会泄漏GDI句柄
+    """
+
+    name = "win32"
+
+    _SRCCOPY = 0x00CC0020
+    _CAPTUREBLT = 0x40000000
+    _DIB_RGB_COLORS = 0
+    _SM_XVIRTUALSCREEN = 76
+    _SM_YVIRTUALSCREEN = 77
+    _SM_CXVIRTUALSCREEN = 78
+    _SM_CYVIRTUALSCREEN = 79
+
+    def __init__(self, pool=None):
+        super().__init__(pool)
+        self._user32 = ctypes.windll.user32
+        self._gdi32 = ctypes.windll.gdi32
+        self._gdi32.CreateDIBSection.restype = ctypes.c_void_p
+        self._gdi32.CreateCompatibleDC.restype = ctypes.c_void_p
+        self._gdi32.SelectObject.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        self._gdi32.SelectObject.restype = ctypes.c_void_p
+        self._gdi32.DeleteObject.argtypes = [ctypes.c_void_p]
+        self._gdi32.DeleteDC.argtypes = [ctypes.c_void_p]
+        self._gdi32.BitBlt.argtypes = (
+            [ctypes.c_void_p]
+            + [ctypes.c_int] * 4
+            + [
+                ctypes.c_void_p,
+                ctypes.c_int,
+                ctypes.c_int,
+                ctypes.c_uint32,
+            ]
+        )
+        self._user32.GetDC.restype = ctypes.c_void_p
+        self._user32.ReleaseDC.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        self._local = threading.local()
+
+    def screen_rect(self):
+        metrics = self._user32.GetSystemMetrics
+        return (
+            metrics(self._SM_XVIRTUALSCREEN),
+            metrics(self._SM_YVIRTUALSCREEN),
+            metrics(self._SM_CXVIRTUALSCREEN),
+            metrics(self._SM_CYVIRTUALSCREEN),
+        )
+
+    def _surface(self, width, height):
+        """返回当前线程可复用的 (内存DC, BGRA像素视图)，尺寸变化时重建"""
+        surface = getattr(self._local, "surface", None)
+        if surface is not None and surface.size == (width, height):
+            return surface.memory_dc, surface.pixels
+        self._release_surface()
+
+        header = _BitmapInfoHeader()
+        header.biSize = ctypes.sizeof(_BitmapInfoHeader)
+        header.biWidth = width
+        header.biHeight = -height  # 负高度表示自上而下的行顺序
+        header.biPlanes = 1
+        header.biBitCount = 32
+
+        memory_dc = self._gdi32.CreateCompatibleDC(None)
+        bits = ctypes.c_void_p()
+        bitmap = self._gdi32.CreateDIBSection(
+            memory_dc,
+            ctypes.byref(header),
+            self._DIB_RGB_COLORS,
+            ctypes.byref(bits),
+            None,
+            0,
+        )
+        if not bitmap:
+            self._gdi32.DeleteDC(memory_dc)
+            raise OSError("CreateDIBSection 失败")
+        self._gdi32.SelectObject(memory_dc, bitmap)
+
+        buffer = (ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)
+        pixels = np.ctypeslib.as_array(buffer).reshape(height, width, 4)
+        self._local.surface = _Surface(
+            self._gdi32, (width, height), memory_dc, bitmap, pixels
+        )
+        return memory_dc, pixels
+
+    def _release_surface(self):
+        surface = getattr(self._local, "surface", None)
+        if surface is None:
+            return
+        self._local.surface = None
+        surface.close()
+
+    def grab(self, region=None):
+        left, top, width, height = region or self.screen_rect()
+        memory_dc, pixels = self._surface(width, height)
+
+        screen_dc = self._user32.GetDC(None)
+        try:
+            if not self._gdi32.BitBlt(
+                memory_dc,
+                0,
+                0,
+                width,
+                height,
+                screen_dc,
+                left,
+                top,
+                self._SRCCOPY | self._CAPTUREBLT,
+            ):
+                raise OSError("BitBlt 失败")
+        finally:
+            self._user32.ReleaseDC(None, screen_dc)
+
+        # BGRA -> 灰度，全部写入复用缓冲区，不产生整帧临时数组
+        out = self.pool.acquire((height, width))
+        scratch = self.pool.acquire((height, width), "scratch")
+        np.multiply(pixels[..., 2], _LUMA_R, out=out, casting="unsafe")
+        np.multiply(pixels[..., 1], _LUMA_G, out=scratch, casting="unsafe")
+        out += scratch
+        np.multiply(pixels[..., 0], _LUMA_B, out=scratch, casting="unsafe")
+        out += scratch
+        return out
+
+
+class FakeCaptureBackend(CaptureBackend):
+    """内存中的截图后端，用于在非Windows环境下测试"""
+
+    name = "fake"
+
+    def __init__(self, frame=None, origin=(0, 0), pool=None):
+        """
+        参数:
+            frame: 模拟的整屏画面（灰度二维数组、RGB数组或PIL图像），
+                   未指定时为 FAKE_SCREEN_SIZE 大小的黑屏
+            origin: 模拟屏幕左上角的坐标
+        """
+        super().__init__(pool)
+        self.origin = origin
+        self.grab_count = 0
+        self._frame = None
+        if frame is None:
+            width, height = FAKE_SCREEN_SIZE
+            frame = np.zeros((height, width), dtype=np.float32)
+        self.set_frame(frame)
+
+    def set_frame(self, frame):
+        """替换模拟的整屏画面"""
+        from template_matcher import to_gray_array
+
+        self._frame = to_gray_array(frame).astype(np.float32)
+
+    def screen_rect(self):
+        return (
+            self.origin[0],
+            self.origin[1],
+            self._frame.shape[1],
+            self._frame.shape[0],
+        )
+
+    def grab(self, region=None):
+        left, top, width, height = region or self.screen_rect()
+        out = self.pool.acquire((height, width))
+        out.fill(0)
+        # 超出模拟屏幕的部分保持为黑色
+        x0 = left - self.origin[0]
+        y0 = top - self.origin[1]
+        src_top, src_left = max(y0, 0), max(x0, 0)
+        src_bottom = min(y0 + height, self._frame.shape[0])
+        src_right = min(x0 + width, self._frame.shape[1])
+        if src_bottom > src_top and src_right > src_left:
+            out[src_top - y0 : src_bottom - y0, src_left - x0 : src_right - x0] = (
+                self._frame[src_top:src_bottom, src_left:src_right]
+            )
+        self.grab_count += 1
+        return out
+
+
+def create_capture_backend(name):
+    """
+    根据名称创建截图后端，Win32后端不可用时回退到pyautogui
+
+    参数:
+        name: "win32"、"pyautogui" 或 "fake"
+
+    返回:
+        CaptureBackend 实例
+    """
+    if name == Win32CaptureBackend.name:
+        try:
+            return Win32CaptureBackend()
+        except Exception as e:
+            logger.warning(f"GDI截图后端不可用，改用pyautogui截图: {e}")
+            return PyAutoGuiCaptureBackend()
+    if name == PyAutoGuiCaptureBackend.name:
+        return PyAutoGuiCaptureBackend()
+    if name == FakeCaptureBackend.name:
+        return FakeCaptureBackend()
+    raise ValueError(f"未知的截图后端: {name}")
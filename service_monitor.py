@@ -5,13 +5,26 @@
 
 import threading
 import logging
+import time
 from typing import Callable, Optional
 
+from circuit_breaker import BackoffPolicy, CircuitBreaker
+from config import RESTART_STABLE_TIME
+from event_log import (
+    EVENT_CHECK,
+    EVENT_CRASH_DETECTED,
+    EVENT_SERVICE_RECOVERED,
+    EVENT_RESTART_STARTED,
+    EVENT_RESTART_SUCCEEDED,
+    EVENT_RESTART_FAILED,
+    record_event,
+)
+
 logger = logging.getLogger()
 
 
 class ServiceMonitor:
-    """用于监控并在需要时触发重启的后台线程"""
+    """在共享调度器上周期检查服务，并在需要时于工作线程中触发重启"""
 
     def __init__(
         self,
@@ -19,52 +32,261 @@ class ServiceMonitor:
         check_func: Callable[[], bool],
         restart_func: Callable[[], bool],
         interval: float,
-        stop_event: Optional[threading.Event] = None,
+        scheduler,
+        pid_func: Optional[Callable[[], Optional[int]]] = None,
+        exit_watcher=None,
+        jitter: float = 0.0,
+        backoff: Optional[BackoffPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hang_detector=None,
+        terminate_func: Optional[Callable[[], bool]] = None,
+        stable_time: float = RESTART_STABLE_TIME,
     ):
         self.name = name
         self._check_func = check_func
         self._restart_func = restart_func
         self._interval = interval
-        self._stop_event = stop_event or threading.Event()
-        self._thread = threading.Thread(
-            target=self._run, name=f"{name}Monitor", daemon=True
-        )
-        self._started = False
+        self._jitter = jitter
+        self._scheduler = scheduler
+        # 进程退出时由退出监视器唤醒，无需等到下一次轮询
+        self._pid_func = pid_func
+        self._exit_watcher = exit_watcher
+        # 连续恢复失败时推迟下一次尝试，达到阈值后熔断
+        self._backoff = backoff or BackoffPolicy()
+        self._breaker = breaker or CircuitBreaker()
+        # 启动函数返回成功不代表服务能持续运行：恢复后需连续健康 stable_time 秒
+        # 才重置失败计数，期间再次故障按一次恢复失败计算
+        self._stable_time = stable_time
+        self._healthy_since = None
+        self._unconfirmed_restart = False
+        # 进程存在但已卡死时，先终止进程再走正常的恢复流程
+        self._hang_detector = hang_detector
+        self._terminate_func = terminate_func
+        self._job = None
+        self._restart_future = None
+        self._paused = False
+        # 首次检测到故障的时间（time.time()），用于计算停机时长（MTTR）
+        self._down_since = None
+        self._lock = threading.Lock()
 
     def start(self):
-        if self._started:
+        if self._job is not None:
             return
-        logger.info(f"{self.name} 监控线程已启动")
-        self._thread.start()
-        self._started = True
+        self._job = self._scheduler.add_job(
+            f"{self.name}Monitor", self._tick, self._interval, self._jitter
+        )
+        logger.info(f"{self.name} 监控已启动")
 
     def stop(self):
-        if not self._started:
+        if self._job is None:
+            return
+        self._job.cancel()
+        self._job = None
+        if self._exit_watcher is not None:
+            self._exit_watcher.unwatch(self.name)
+        logger.info(f"{self.name} 监控已停止")
+
+    def pause(self):
+        """暂停检查与恢复（如计划重启期间由调用方统一结束和启动服务）"""
+        self._paused = True
+        if self._exit_watcher is not None:
+            self._exit_watcher.unwatch(self.name)
+        if self._hang_detector is not None:
+            self._hang_detector.reset()
+
+    def resume(self):
+        """恢复检查，并立即执行一次"""
+        self._paused = False
+        job = self._job
+        if job is not None:
+            job.trigger()
+
+    def notify_exit(self, key=None, pid=None):
+        """被监视进程退出时调用，立即触发一次检查"""
+        logger.warning(f"检测到 {self.name} 进程已退出 (PID {pid})")
+        job = self._job
+        if job is not None:
+            job.trigger()
+
+    def _watch_process(self):
+        """检查通过后开始监视当前进程的退出"""
+        if self._exit_watcher is None or self._pid_func is None:
+            return
+        try:
+            pid = self._pid_func()
+        except Exception as exc:
+            logger.warning(f"获取 {self.name} 进程PID失败: {exc}")
+            return
+        if pid:
+            self._exit_watcher.watch(self.name, pid, self.notify_exit)
+
+    def _terminate_hung_process(self):
+        # 退出监视器会随进程结束触发一次检查，此时恢复仍在进行中会被跳过
+        if self._exit_watcher is not None:
+            self._exit_watcher.unwatch(self.name)
+        if self._terminate_func is not None and not self._terminate_func():
+            logger.warning(f"结束卡死的 {self.name} 进程失败")
+        self._hang_detector.reset()
+
+    def status(self):
+        """
+        返回监控状态，供GUI和统计使用
+
+        返回:
+            dict: name、state（closed/open/half_open）、consecutive_failures、retry_in、paused
+        """
+        return {
+            "name": self.name,
+            "paused": self._paused,
+            "state": self._breaker.state,
+            "consecutive_failures": self._breaker.consecutive_failures,
+            "retry_in": self._breaker.retry_in(),
+        }
+
+    def _tick(self):
+        """在调度线程上执行的检查，重启交给工作线程，避免阻塞其他服务的检查"""
+        if self._paused:
             return
-        self._stop_event.set()
-        self._thread.join(timeout=5)
-        logger.info(f"{self.name} 监控线程已停止")
-
-    def _run(self):
-        while not self._stop_event.is_set():
-            try:
-                running = self._check_func()
-            except Exception as exc:
-                logger.error(f"{self.name} 状态检查失败: {exc}", exc_info=True)
-                running = True
-
-            if not running:
-                logger.warning(f"{self.name} 未运行，正在尝试恢复...")
-                self._attempt_restart()
-
-            if self._stop_event.wait(self._interval):
-                break
-
-    def _attempt_restart(self):
+        with self._lock:
+            if self._restart_future is not None and not self._restart_future.done():
+                return
+
+        check_start = time.monotonic()
         try:
-            if self._restart_func():
-                logger.info(f"{self.name} 恢复成功")
-            else:
-                logger.error(f"{self.name} 恢复失败，请检查日志获取更多信息")
+            running = self._check_func()
+        except Exception as exc:
+            logger.error(f"{self.name} 状态检查失败: {exc}", exc_info=True)
+            running = True
+
+        hang_reason = None
+        if running and self._hang_detector is not None:
+            hang_reason = self._hang_detector.sample()
+        record_event(
+            EVENT_CHECK,
+            service=self.name,
+            running=running,
+            hung=hang_reason is not None,
+            duration_ms=round((time.monotonic() - check_start) * 1000, 1),
+        )
+
+        if running and hang_reason is None:
+            if self._down_since is not None:
+                # 恢复失败后服务自行恢复（或由其他服务的恢复一并拉起）
+                record_event(
+                    EVENT_SERVICE_RECOVERED,
+                    service=self.name,
+                    downtime_s=round(time.time() - self._down_since, 3),
+                )
+                self._down_since = None
+            now = time.monotonic()
+            if self._healthy_since is None:
+                self._healthy_since = now
+            if (
+                self._unconfirmed_restart or self._breaker.consecutive_failures
+            ) and now - self._healthy_since >= self._stable_time:
+                logger.info(
+                    f"{self.name} 已稳定运行 {self._stable_time:.0f} 秒，重置失败计数"
+                )
+                self._unconfirmed_restart = False
+                self._breaker.record_success()
+            self._watch_process()
+            return
+
+        self._healthy_since = None
+
+        if self._down_since is None:
+            self._down_since = time.time()
+            record_event(
+                EVENT_CRASH_DETECTED,
+                service=self.name,
+                reason="hung" if hang_reason is not None else "not_running",
+                detail=hang_reason,
+            )
+
+        if self._unconfirmed_restart:
+            # 上一次恢复后未能稳定运行（如启动后很快再次崩溃），计为一次恢复失败
+            self._unconfirmed_restart = False
+            if self._record_restart_failure("恢复后未能稳定运行"):
+                return
+
+        # 熔断期间只做廉价的存活检查，不再反复尝试恢复
+        if not self._breaker.allow_attempt():
+            return
+
+        if hang_reason is not None:
+            logger.warning(
+                f"{self.name} 疑似卡死（{hang_reason}），正在结束进程并恢复..."
+            )
+        else:
+            logger.warning(f"{self.name} 未运行，正在尝试恢复...")
+        with self._lock:
+            self._restart_future = self._scheduler.submit(
+                self._attempt_restart, hang_reason is not None
+            )
+
+    def _attempt_restart(self, hung=False):
+        attempt = self._breaker.consecutive_failures + 1
+        record_event(
+            EVENT_RESTART_STARTED, service=self.name, hung=hung, attempt=attempt
+        )
+        restart_start = time.monotonic()
+        try:
+            if hung:
+                self._terminate_hung_process()
+            succeeded = self._restart_func()
         except Exception as exc:
             logger.error(f"{self.name} 恢复过程中出错: {exc}", exc_info=True)
+            succeeded = False
+        duration_ms = round((time.monotonic() - restart_start) * 1000, 1)
+
+        if succeeded:
+            # 稳定运行 stable_time 秒后才重置失败计数
+            logger.info(f"{self.name} 恢复成功")
+            self._unconfirmed_restart = True
+            down_since, self._down_since = self._down_since, None
+            record_event(
+                EVENT_RESTART_SUCCEEDED,
+                service=self.name,
+                attempt=attempt,
+                duration_ms=duration_ms,
+                downtime_s=(
+                    None if down_since is None else round(time.time() - down_since, 3)
+                ),
+            )
+            return
+
+        record_event(
+            EVENT_RESTART_FAILED,
+            service=self.name,
+            attempt=attempt,
+            duration_ms=duration_ms,
+            breaker_open=self._record_restart_failure("恢复失败"),
+        )
+
+    def _record_restart_failure(self, description):
+        """
+        记录一次恢复失败并按退避时间推迟下一次检查
+
+        返回:
+            bool: 已熔断或已推迟下一次检查时返回True（本次不应立即恢复）
+        """
+        opened = self._breaker.record_failure()
+        failures = self._breaker.consecutive_failures
+        if opened:
+            # 熔断后照常按间隔检查，冷却结束后的第一次检查放行一次试探恢复
+            logger.error(
+                f"{self.name} 已连续恢复失败 {failures} 次，"
+                f"暂停恢复 {self._breaker.reset_timeout:.0f} 秒"
+            )
+            return True
+
+        delay = self._backoff.delay(failures)
+        logger.error(
+            f"{self.name} {description}（连续 {failures} 次），"
+            f"{delay:.0f} 秒后重试，请检查日志获取更多信息"
+        )
+        job = self._job
+        if job is not None and delay > self._interval:
+            self._scheduler.reschedule(job, delay)
+            return True
+        return False
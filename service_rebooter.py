@@ -1,26 +1,76 @@
 """
 服务重启模块
-封装 Battle.net、Diablo III 与 ROS-BOT 的重启逻辑
+按依赖关系 Battle.net → Diablo III → ROS-BOT 封装三者的重启逻辑
 """
 
 import logging
-from game_launcher import launch_battle_net, launch_diablo_iii
-from rosbot_manager import launch_rosbot_admin
+from functools import partial
+from config import D3_PROCESS_NAME, BATTLE_NET_PROCESS_NAME, ROS_BOT_PROCESS_NAME
+from game_launcher import (
+    launch_battle_net,
+    launch_diablo_iii,
+    is_battle_net_running,
+    is_diablo_iii_running,
+)
+from rosbot_manager import launch_rosbot_admin, is_rosbot_running
+from process_manager import terminate_process
+from restart_graph import RestartGraph
 
 logger = logging.getLogger()
 
+BATTLE_NET = "Battle.net"
+DIABLO_III = "Diablo III"
+ROS_BOT = "ROS-BOT"
+
+_PROCESS_NAMES = {
+    BATTLE_NET: BATTLE_NET_PROCESS_NAME,
+    DIABLO_III: D3_PROCESS_NAME,
+    ROS_BOT: ROS_BOT_PROCESS_NAME,
+}
+
+_restart_graph = RestartGraph()
+_restart_graph.add_service(BATTLE_NET, is_battle_net_running, launch_battle_net)
+_restart_graph.add_service(
+    DIABLO_III,
+    is_diablo_iii_running,
+    partial(launch_diablo_iii, ensure_battle_net=False),
+    depends_on=[BATTLE_NET],
+)
+_restart_graph.add_service(
+    ROS_BOT, is_rosbot_running, launch_rosbot_admin, depends_on=[DIABLO_III]
+)
+
+
+def get_restart_graph():
+    """获取服务依赖图"""
+    return _restart_graph
+
 
 def restart_diablo_iii():
     logger.info("Diablo III 未运行，正在尝试启动...")
-    return launch_diablo_iii()
+    return _restart_graph.restart(DIABLO_III)
 
 
 def restart_battle_net():
     logger.info("Battle.net 未运行，正在尝试启动...")
-    return launch_battle_net()
+    return _restart_graph.restart(BATTLE_NET)
 
 
 def restart_rosbot():
     logger.info("ROS-BOT 未运行，正在尝试以管理员权限启动...")
-    return launch_rosbot_admin()
+    return _restart_graph.restart(ROS_BOT)
+
+
+def recycle_services():
+    """
+    计划重启全部服务：按依赖的逆序（ROS-BOT → Diablo III → Battle.net）结束进程，
+    再按依赖顺序重新启动
 
+    返回:
+        bool: 全部服务重新启动成功返回True
+    """
+    order = _restart_graph.topological_order()
+    for name in reversed(order):
+        logger.info(f"计划重启：正在结束 {name}...")
+        terminate_process(_PROCESS_NAMES[name])
+    return all(_restart_graph.ensure_running(name) for name in order)
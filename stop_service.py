@@ -3,7 +3,6 @@
 运行此脚本可以安全地停止Diablo III自动启动器
 """
 
-import os
 import sys
 
 
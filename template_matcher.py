@@ -0,0 +1,440 @@
+"""
+模板匹配模块
+基于NumPy的归一化互相关（NCC）模板匹配引擎，大尺寸截图自动切换为FFT计算
+"""
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger()
+
+# 与 pyautogui 返回的 Box 保持相同的前四个字段，pyautogui.center 可直接使用
+MatchResult = namedtuple("MatchResult", ["left", "top", "width", "height", "score"])
+
+# 方差低于该值的窗口视为纯色区域，避免除零
+_VARIANCE_EPSILON = 1e-6
+
+# 金字塔粗搜索时模板缩小后的最小边长，小于该值时降低缩放倍数
+_PYRAMID_MIN_TEMPLATE_SIZE = 6
+
+# 模板在最差像素对齐下缩小后与自身粗模板的最低相关度，低于该值时降低缩放倍数
+_PYRAMID_MIN_ALIGNMENT = 0.5
+
+
+def to_gray_array(image):
+    """
+    将PIL图像或NumPy数组转换为浮点灰度数组
+
+    参数:
+        image: PIL.Image 或 ndarray（灰度二维数组，或RGB/RGBA三维数组）
+
+    返回:
+        ndarray: 形状为 (height, width) 的浮点数组（浮点输入保持原精度）
+    """
+    if isinstance(image, np.ndarray):
+        array = image
+    else:
+        if image.mode != "L":
+            image = image.convert("L")
+        array = np.asarray(image)
+
+    if array.ndim == 3:
+        # 与PIL "L" 模式相同的ITU-R 601-2亮度转换
+        rgb = array[..., :3].astype(np.float64)
+        array = rgb @ np.array([0.299, 0.587, 0.114])
+    if np.issubdtype(array.dtype, np.floating):
+        # 截图缓冲区已是浮点灰度，直接使用以免整帧复制
+        return array
+    return np.asarray(array, dtype=np.float64)
+
+
+class TemplateImage:
+    """已解码的模板图片，缓存灰度数据与归一化所需的统计量"""
+
+    def __init__(self, path, gray, zero_mean=None, norm=None):
+        self.path = path
+        gray = np.asarray(gray)
+        if not np.issubdtype(gray.dtype, np.floating):
+            gray = gray.astype(np.float64)
+        self.gray = gray
+        self.height, self.width = self.gray.shape
+        if zero_mean is None:
+            zero_mean = self.gray - self.gray.mean(dtype=np.float64)
+        self.zero_mean = zero_mean
+        if norm is None:
+            norm = float(np.sqrt(np.sum(zero_mean * zero_mean, dtype=np.float64)))
+        self.norm = norm
+        self._levels = {}
+        self._alignment = {}
+
+    def level(self, factor):
+        """返回按factor缩小后的模板，结果会被缓存"""
+        if factor == 1:
+            return self
+        if factor not in self._levels:
+            self._levels[factor] = TemplateImage(
+                self.path, downscale(self.gray, factor)
+            )
+        return self._levels[factor]
+
+    def set_level(self, factor, level, alignment=None):
+        """注入预先计算好的缩小模板及其对齐得分（用于模板包加载）"""
+        self._levels[factor] = level
+        if alignment is not None:
+            self._alignment[factor] = alignment
+
+    def alignment_score(self, factor):
+        """
+        估计模板在截图中任意像素偏移下，缩小后与粗模板的最低相关度
+
+        截图中的模板位置通常不是factor的整数倍，块平均后的纹理会变形；
+        该值越低，粗搜索越可能漏掉真实位置
+        """
+        if factor not in self._alignment:
+            coarse = self.level(factor).gray
+            worst = 1.0
+            for dy in range(factor):
+                for dx in range(factor):
+                    shifted = downscale(self.gray[dy:, dx:], factor)
+                    height = min(shifted.shape[0], coarse.shape[0])
+                    width = min(shifted.shape[1], coarse.shape[1])
+                    a = shifted[:height, :width] - shifted[:height, :width].mean()
+                    b = coarse[:height, :width] - coarse[:height, :width].mean()
+                    denominator = np.sqrt(np.sum(a * a) * np.sum(b * b))
+                    if denominator > _VARIANCE_EPSILON:
+                        worst = min(worst, float(np.sum(a * b) / denominator))
+            self._alignment[factor] = worst
+        return self._alignment[factor]
+
+    @classmethod
+    def load(cls, path):
+        """从磁盘读取并解码模板图片"""
+        from PIL import Image
+
+        with Image.open(path) as image:
+            return cls(path, to_gray_array(image))
+
+
+def downscale(gray, factor):
+    """按factor×factor像素块取平均进行缩小，多余的边缘行列被裁掉"""
+    if factor == 1:
+        return gray
+    height = gray.shape[0] // factor * factor
+    width = gray.shape[1] // factor * factor
+    blocks = gray[:height, :width].reshape(
+        height // factor, factor, width // factor, factor
+    )
+    return blocks.mean(axis=(1, 3))
+
+
+def _next_fast_len(n):
+    """返回不小于n且只含2、3、5因子的长度，FFT在这些长度上最快"""
+    best = 1 << (n - 1).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            candidate = p35
+            while candidate < n:
+                candidate *= 2
+            best = min(best, candidate)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _window_sums(haystack, height, width):
+    """利用积分图计算所有模板大小窗口内的像素和与平方和"""
+    padded = np.zeros((haystack.shape[0] + 1, haystack.shape[1] + 1))
+    padded[1:, 1:] = haystack
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    padded[1:, 1:] = haystack * haystack
+    integral_sq = padded.cumsum(axis=0).cumsum(axis=1)
+
+    def _box(table):
+        return (
+            table[height:, width:]
+            - table[:-height, width:]
+            - table[height:, :-width]
+            + table[:-height, :-width]
+        )
+
+    return _box(integral), _box(integral_sq)
+
+
+def _correlate_direct(haystack, kernel):
+    """逐窗口直接计算互相关，适合小尺寸输入"""
+    out_h = haystack.shape[0] - kernel.shape[0] + 1
+    result = np.zeros((out_h, haystack.shape[1] - kernel.shape[1] + 1))
+    # 按模板行累加，避免一次性展开全部窗口占用大量内存
+    for row, weights in enumerate(kernel):
+        windows = sliding_window_view(haystack[row : row + out_h], len(weights), axis=1)
+        result += np.einsum("ijk,k->ij", windows, weights)
+    return result
+
+
+def _correlate_fft(haystack, kernel):
+    """通过FFT计算互相关，适合大尺寸截图"""
+    out_h = haystack.shape[0] - kernel.shape[0] + 1
+    out_w = haystack.shape[1] - kernel.shape[1] + 1
+    shape = (_next_fast_len(haystack.shape[0]), _next_fast_len(haystack.shape[1]))
+    spectrum = np.fft.rfft2(haystack, shape) * np.conj(np.fft.rfft2(kernel, shape))
+    return np.fft.irfft2(spectrum, shape)[:out_h, :out_w]
+
+
+def _choose_method(haystack_shape, kernel_shape):
+    """按估算的运算量在直接计算与FFT之间选择"""
+    out_area = (haystack_shape[0] - kernel_shape[0] + 1) * (
+        haystack_shape[1] - kernel_shape[1] + 1
+    )
+    direct_cost = out_area * kernel_shape[0] * kernel_shape[1]
+    fft_area = _next_fast_len(haystack_shape[0]) * _next_fast_len(haystack_shape[1])
+    fft_cost = 2 * fft_area * np.log2(max(fft_area, 2))
+    return "direct" if direct_cost <= fft_cost else "fft"
+
+
+def ncc_map(haystack, template, method="auto"):
+    """
+    计算模板在截图上每个位置的零均值归一化互相关得分
+
+    参数:
+        haystack: 灰度截图数组
+        template: TemplateImage 实例
+        method: "auto"、"direct" 或 "fft"
+
+    返回:
+        ndarray: 形状为 (H-h+1, W-w+1) 的得分矩阵，取值范围 [-1, 1]；
+                 截图小于模板时返回 None
+    """
+    height, width = template.height, template.width
+    if haystack.shape[0] < height or haystack.shape[1] < width:
+        return None
+
+    count = height * width
+    sums, sums_sq = _window_sums(haystack, height, width)
+    variance = np.maximum(sums_sq - sums * sums / count, 0.0)
+
+    if template.norm < _VARIANCE_EPSILON:
+        # 纯色模板：只有同为纯色且亮度一致的窗口才算匹配
+        flat = variance < _VARIANCE_EPSILON * count
+        same_level = np.abs(sums / count - template.gray.mean(dtype=np.float64)) < 0.5
+        return (flat & same_level).astype(np.float64)
+
+    if method == "auto":
+        method = _choose_method(haystack.shape, template.zero_mean.shape)
+    if method == "fft":
+        numerator = _correlate_fft(haystack, template.zero_mean)
+    else:
+        numerator = _correlate_direct(haystack, template.zero_mean)
+
+    denominator = np.sqrt(variance) * template.norm
+    scores = np.zeros_like(numerator)
+    np.divide(numerator, denominator, out=scores, where=denominator > _VARIANCE_EPSILON)
+    return np.clip(scores, -1.0, 1.0, out=scores)
+
+
+def match_template(haystack, template, method="auto"):
+    """
+    在截图中查找模板的最佳匹配位置
+
+    参数:
+        haystack: 灰度截图数组
+        template: TemplateImage 实例
+        method: "auto"、"direct" 或 "fft"
+
+    返回:
+        MatchResult: 最佳匹配位置与得分；截图小于模板时返回 None
+    """
+    scores = ncc_map(haystack, template, method)
+    if scores is None:
+        return None
+    top, left = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return MatchResult(
+        int(left), int(top), template.width, template.height, float(scores[top, left])
+    )
+
+
+def _top_peaks(scores, count, suppress_h, suppress_w):
+    """取得分最高的count个峰值，每取一个就抑制其邻域，避免候选扎堆"""
+    scores = scores.copy()
+    peaks = []
+    for _ in range(count):
+        index = int(np.argmax(scores))
+        top, left = np.unravel_index(index, scores.shape)
+        if scores[top, left] == -np.inf:
+            break
+        peaks.append((int(top), int(left)))
+        scores[
+            max(top - suppress_h, 0) : top + suppress_h + 1,
+            max(left - suppress_w, 0) : left + suppress_w + 1,
+        ] = -np.inf
+    return peaks
+
+
+def _effective_factor(template, factor):
+    """模板缩小后过小或细节丢失过多时逐级减半缩放倍数，返回1表示只能全分辨率搜索"""
+    while factor > 1 and (
+        template.height // factor < _PYRAMID_MIN_TEMPLATE_SIZE
+        or template.width // factor < _PYRAMID_MIN_TEMPLATE_SIZE
+        or template.alignment_score(factor) < _PYRAMID_MIN_ALIGNMENT
+    ):
+        factor //= 2
+    return max(factor, 1)
+
+
+def match_template_pyramid(
+    haystack, template, factor=4, candidates=5, method="auto", frame=None
+):
+    """
+    由粗到细的金字塔搜索：先在缩小的截图上找候选位置，再在全分辨率下的小窗口内确认
+
+    参数:
+        haystack: 灰度截图数组
+        template: TemplateImage 实例
+        factor: 粗搜索的缩放倍数（如4或8）
+        candidates: 进入全分辨率确认的候选数量
+        method: "auto"、"direct" 或 "fft"
+        frame: 可选的 GrayFrame，用于在多个模板之间复用缩小后的截图
+
+    返回:
+        MatchResult: 候选中得分最高的匹配；截图小于模板时返回 None
+    """
+    factor = _effective_factor(template, factor)
+    if factor == 1:
+        return match_template(haystack, template, method)
+
+    coarse_template = template.level(factor)
+    coarse_haystack = (
+        frame.level(factor) if frame is not None else downscale(haystack, factor)
+    )
+    coarse_scores = ncc_map(coarse_haystack, coarse_template, method)
+    if coarse_scores is None:
+        return match_template(haystack, template, method)
+
+    peaks = _top_peaks(
+        coarse_scores,
+        candidates,
+        max(coarse_template.height // 2, 1),
+        max(coarse_template.width // 2, 1),
+    )
+
+    # 粗搜索峰值与真实位置最多相差约一个块，确认窗口向四周各留两个块
+    radius = 2 * factor
+    best = None
+    for coarse_top, coarse_left in peaks:
+        top = max(coarse_top * factor - radius, 0)
+        left = max(coarse_left * factor - radius, 0)
+        bottom = min(coarse_top * factor + radius + template.height, haystack.shape[0])
+        right = min(coarse_left * factor + radius + template.width, haystack.shape[1])
+        result = match_template(haystack[top:bottom, left:right], template, method)
+        if result is None:
+            continue
+        if best is None or result.score > best.score:
+            best = result._replace(left=result.left + left, top=result.top + top)
+    return best
+
+
+class GrayFrame:
+    """一帧灰度截图，缓存各缩放倍数的缩小结果，供多个模板共用"""
+
+    def __init__(self, gray):
+        self.gray = gray
+        self._levels = {}
+
+    def level(self, factor):
+        """返回按factor缩小后的截图，结果会被缓存"""
+        if factor == 1:
+            return self.gray
+        if factor not in self._levels:
+            self._levels[factor] = downscale(self.gray, factor)
+        return self._levels[factor]
+
+
+class NumpyMatchEngine:
+    """基于NumPy的NCC匹配引擎"""
+
+    name = "numpy"
+
+    def __init__(self, method="auto", pyramid_factor=1, pyramid_candidates=5):
+        self.method = method
+        self.pyramid_factor = pyramid_factor
+        self.pyramid_candidates = pyramid_candidates
+
+    def prepare(self, haystack):
+        """把截图转换为灰度帧，同一帧匹配多个模板时只需转换一次"""
+        if isinstance(haystack, GrayFrame):
+            return haystack
+        return GrayFrame(to_gray_array(haystack))
+
+    def match(self, template, frame):
+        """在灰度帧上返回最佳匹配（不做置信度过滤）"""
+        if self.pyramid_factor > 1:
+            return match_template_pyramid(
+                frame.gray,
+                template,
+                self.pyramid_factor,
+                self.pyramid_candidates,
+                self.method,
+                frame,
+            )
+        return match_template(frame.gray, template, self.method)
+
+    def locate(self, template, haystack, confidence):
+        """返回得分不低于confidence的最佳匹配，否则返回None"""
+        result = self.match(template, self.prepare(haystack))
+        if result is not None and result.score >= confidence:
+            return result
+        return None
+
+
+class PyAutoGuiMatchEngine:
+    """沿用pyautogui/pyscreeze的匹配实现，便于对比和回退"""
+
+    name = "pyautogui"
+
+    def prepare(self, haystack):
+        """pyscreeze 需要PIL图像，灰度数组会被转换"""
+        if isinstance(haystack, GrayFrame):
+            haystack = haystack.gray
+        if isinstance(haystack, np.ndarray):
+            from PIL import Image
+
+            return Image.fromarray(np.clip(haystack, 0, 255).astype(np.uint8))
+        return haystack
+
+    def locate(self, template, haystack, confidence):
+        """返回得分不低于confidence的匹配，否则返回None"""
+        import pyscreeze
+
+        try:
+            box = pyscreeze.locate(
+                template.path, self.prepare(haystack), confidence=confidence
+            )
+        except pyscreeze.ImageNotFoundException:
+            return None
+        if box is None:
+            return None
+        return MatchResult(box.left, box.top, box.width, box.height, confidence)
+
+
+def get_match_engine(name, method="auto", pyramid_factor=1, pyramid_candidates=5):
+    """
+    根据名称创建匹配引擎
+
+    参数:
+        name: 引擎名称（"numpy" 或 "pyautogui"）
+        method: numpy引擎的计算方式（"auto"、"direct" 或 "fft"）
+        pyramid_factor: numpy引擎金字塔粗搜索的缩放倍数，1表示全分辨率穷举搜索
+        pyramid_candidates: 金字塔搜索进入全分辨率确认的候选数量
+
+    返回:
+        匹配引擎实例
+    """
+    if name == NumpyMatchEngine.name:
+        return NumpyMatchEngine(method, pyramid_factor, pyramid_candidates)
+    if name == PyAutoGuiMatchEngine.name:
+        return PyAutoGuiMatchEngine()
+    raise ValueError(f"未知的图片匹配引擎: {name}")
@@ -0,0 +1,322 @@
+"""
+模板注册表模块
+启动时将配置中的模板图片一次性解码为二进制模板包，并以内存映射方式加载
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from config import (
+    TEMPLATE_IMAGES,
+    TEMPLATE_BUNDLE_FILE,
+    IMAGE_SEARCH_PYRAMID,
+    IMAGE_SEARCH_PYRAMID_FACTOR,
+)
+from template_matcher import TemplateImage, downscale
+
+logger = logging.getLogger()
+
+# 文件格式: 魔数 + 版本 + 头部长度 + JSON头部 + 按64字节对齐的float32数据区
+_BUNDLE_MAGIC = b"D3TB"
+_BUNDLE_VERSION = 1
+_PREFIX = struct.Struct("<4sIQ")
+_ALIGNMENT = 64
+
+
+def _pyramid_factors():
+    """需要预先计算的金字塔缩放倍数（配置倍数及其逐级减半的倍数）"""
+    factors = []
+    factor = IMAGE_SEARCH_PYRAMID_FACTOR if IMAGE_SEARCH_PYRAMID else 1
+    while factor > 1:
+        factors.append(factor)
+        factor //= 2
+    return factors
+
+
+def _file_sha256(path):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class TemplateRegistry:
+    """模板注册表：按路径提供预先解码好的 TemplateImage"""
+
+    def __init__(self, bundle_path, image_paths, factors=None):
+        self.bundle_path = bundle_path
+        self.image_paths = list(image_paths)
+        self.factors = _pyramid_factors() if factors is None else list(factors)
+        self._templates = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def get(self, path):
+        """
+        获取模板，未注册的路径会从磁盘解码并缓存在内存中
+
+        参数:
+            path: 模板图片路径
+
+        返回:
+            TemplateImage 或 None（文件不存在时）
+        """
+        self.load()
+        template = self._templates.get(path)
+        if template is not None:
+            return template
+
+        if not os.path.exists(path):
+            return None
+        template = TemplateImage.load(path)
+        with self._lock:
+            self._templates[path] = template
+        return template
+
+    def __contains__(self, path):
+        self.load()
+        return path in self._templates
+
+    def load(self):
+        """加载模板包，必要时重新构建；多次调用只执行一次"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                self._load_or_rebuild()
+            except Exception as e:
+                logger.error(f"加载模板包失败，改为直接解码图片: {e}", exc_info=True)
+                self._load_from_images()
+            self._loaded = True
+
+    def _load_or_rebuild(self):
+        header = self._read_header(self.bundle_path)
+        entries = header["entries"] if header else {}
+        if header and header.get("factors") != self.factors:
+            entries = {}
+
+        stale = []
+        for path in self.image_paths:
+            entry = entries.get(path)
+            if not os.path.exists(path):
+                # 打包版本可能只随附模板包而不带原始图片
+                if entry is None:
+                    logger.warning(f"模板图片 {path} 不存在，且模板包中没有缓存")
+                continue
+            stat = os.stat(path)
+            if (
+                entry
+                and entry["mtime"] == stat.st_mtime
+                and entry["size"] == stat.st_size
+            ):
+                continue
+            if entry and entry["sha256"] == _file_sha256(path):
+                # 内容未变，只是修改时间变化：无需重新解码，也不为此重写模板包
+                # （其他模板变化需要重建时会一并写入新的修改时间）
+                entry["mtime"] = stat.st_mtime
+                entry["size"] = stat.st_size
+                continue
+            stale.append(path)
+
+        if stale or header is None:
+            logger.info(f"正在构建模板包 {self.bundle_path}...")
+            self._write_bundle(entries)
+            header = self._read_header(self.bundle_path)
+        self._map_bundle(header)
+
+    def _read_header(self, bundle_path):
+        """读取模板包头部，文件不存在或格式不符时返回None"""
+        if not os.path.exists(bundle_path):
+            return None
+        with open(bundle_path, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) != _PREFIX.size:
+                return None
+            magic, version, header_len = _PREFIX.unpack(prefix)
+            if magic != _BUNDLE_MAGIC or version != _BUNDLE_VERSION:
+                return None
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        header["data_offset"] = _align(_PREFIX.size + header_len)
+        return header
+
+    def _encode_template(self, path, entry):
+        """解码图片并生成写入模板包所需的数组列表"""
+        stat = os.stat(path)
+        if entry is not None and entry["mtime"] == stat.st_mtime:
+            sha256 = entry["sha256"]
+        else:
+            sha256 = _file_sha256(path)
+
+        template = TemplateImage.load(path)
+        arrays = {
+            "gray": template.gray,
+            "zero_mean": template.zero_mean,
+        }
+        alignment = {}
+        for factor in self.factors:
+            arrays[f"level_{factor}"] = downscale(template.gray, factor)
+            alignment[str(factor)] = template.alignment_score(factor)
+        meta = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "sha256": sha256,
+            "norm": template.norm,
+            "alignment": alignment,
+        }
+        return meta, arrays
+
+    def _write_bundle(self, old_entries):
+        """重新生成整个模板包，先写临时文件再原子替换"""
+        old_header = self._read_header(self.bundle_path)
+        old_data = None
+        if old_header is not None:
+            old_data = np.memmap(self.bundle_path, dtype=np.uint8, mode="r")
+
+        entries = {}
+        blobs = []
+        offset = 0
+        for path in self.image_paths:
+            entry = old_entries.get(path)
+            if os.path.exists(path):
+                stat = os.stat(path)
+                unchanged = (
+                    entry is not None
+                    and old_data is not None
+                    and entry["mtime"] == stat.st_mtime
+                    and entry["size"] == stat.st_size
+                )
+            else:
+                unchanged = entry is not None and old_data is not None
+                if not unchanged:
+                    continue
+
+            if unchanged:
+                meta = {k: v for k, v in entry.items() if k != "arrays"}
+                arrays = {
+                    name: self._view(old_data, old_header["data_offset"], spec)
+                    for name, spec in entry["arrays"].items()
+                }
+            else:
+                meta, arrays = self._encode_template(path, entry)
+
+            meta["arrays"] = {}
+            for name, array in arrays.items():
+                data = np.ascontiguousarray(array, dtype=np.float32).tobytes()
+                meta["arrays"][name] = {"offset": offset, "shape": list(array.shape)}
+                blobs.append((offset, data))
+                offset = _align(offset + len(data))
+            entries[path] = meta
+        # 释放对旧映射区的引用，便于随后替换文件
+        arrays = array = None
+
+        header = json.dumps(
+            {"factors": self.factors, "entries": entries}, ensure_ascii=False
+        ).encode("utf-8")
+        data_offset = _align(_PREFIX.size + len(header))
+
+        tmp_path = f"{self.bundle_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREFIX.pack(_BUNDLE_MAGIC, _BUNDLE_VERSION, len(header)))
+            f.write(header)
+            for blob_offset, data in blobs:
+                f.seek(data_offset + blob_offset)
+                f.write(data)
+            f.truncate(data_offset + offset)
+
+        # Windows 下被映射的文件不能替换，先释放旧映射
+        del old_data
+        self._mmap = None
+        os.replace(tmp_path, self.bundle_path)
+
+    @staticmethod
+    def _view(buffer, data_offset, spec):
+        """从映射区取出一个float32数组视图（不复制数据）"""
+        start = data_offset + spec["offset"]
+        count = int(np.prod(spec["shape"]))
+        return buffer[start : start + count * 4].view(np.float32).reshape(spec["shape"])
+
+    def _map_bundle(self, header):
+        """内存映射模板包并构造 TemplateImage"""
+        self._mmap = np.memmap(self.bundle_path, dtype=np.uint8, mode="r")
+        data_offset = header["data_offset"]
+        templates = {}
+        for path, entry in header["entries"].items():
+            arrays = entry["arrays"]
+            template = TemplateImage(
+                path,
+                self._view(self._mmap, data_offset, arrays["gray"]),
+                self._view(self._mmap, data_offset, arrays["zero_mean"]),
+                entry["norm"],
+            )
+            for factor in self.factors:
+                spec = arrays.get(f"level_{factor}")
+                if spec is None:
+                    continue
+                level = TemplateImage(path, self._view(self._mmap, data_offset, spec))
+                template.set_level(factor, level, entry["alignment"].get(str(factor)))
+            templates[path] = template
+        self._templates = templates
+        logger.info(f"模板包已加载，共 {len(templates)} 个模板")
+
+    def _load_from_images(self):
+        """模板包不可用时直接解码所有图片"""
+        self._templates = {}
+        for path in self.image_paths:
+            if os.path.exists(path):
+                self._templates[path] = TemplateImage.load(path)
+
+
+def _resolve_bundle_path():
+    """优先使用程序目录下的模板包，打包版本可回退到随附的模板包"""
+    bundled_dir = getattr(sys, "_MEIPASS", None)
+    if bundled_dir and not os.path.exists(TEMPLATE_BUNDLE_FILE):
+        bundled = os.path.join(bundled_dir, os.path.basename(TEMPLATE_BUNDLE_FILE))
+        if os.path.exists(bundled):
+            return bundled
+    return TEMPLATE_BUNDLE_FILE
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """获取全局模板注册表（首次调用时创建）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry(_resolve_bundle_path(), TEMPLATE_IMAGES)
+    return _registry
+
+
+def get_template(path):
+    """按路径获取模板，文件不存在时返回None"""
+    return get_registry().get(path)
+
+
+def preload_templates():
+    """启动时加载全部配置模板"""
+    get_registry().load()
+
+
+if __name__ == "__main__":
+    # 构建模板包，供打包发布时随附
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    preload_templates()
@@ -0,0 +1,187 @@
+"""
+窗口索引模块
+一次 EnumWindows 遍历建立 PID → 窗口列表的索引，短时间内的多次窗口查找共享同一份结果
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from config import WINDOW_INDEX_TTL
+
+logger = logging.getLogger()
+
+WindowInfo = namedtuple("WindowInfo", ["hwnd", "pid", "title", "rect", "visible"])
+
+
+class WindowBackend:
+    """窗口枚举后端基类"""
+
+    name = "base"
+
+    def enum_windows(self):
+        """
+        枚举所有顶层窗口（按Z顺序，最上层在前）
+
+        返回:
+            list: WindowInfo 列表；不可见窗口的标题和矩形不读取，分别为 "" 和 None
+        """
+        raise NotImplementedError
+
+
+class Win32WindowBackend(WindowBackend):
+    """通过 win32gui.EnumWindows 一次遍历读取全部窗口信息"""
+
+    name = "win32"
+
+    def __init__(self):
+        import win32gui
+        import win32process
+
+        self._win32gui = win32gui
+        self._win32process = win32process
+
+    def enum_windows(self):
+        win32gui = self._win32gui
+        get_pid = self._win32process.GetWindowThreadProcessId
+        windows = []
+
+        def enum_callback(hwnd, _):
+            try:
+                _, pid = get_pid(hwnd)
+                if not win32gui.IsWindowVisible(hwnd):
+                    windows.append(WindowInfo(hwnd, pid, "", None, False))
+                    return
+                left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+                windows.append(
+                    WindowInfo(
+                        hwnd,
+                        pid,
+                        win32gui.GetWindowText(hwnd),
+                        (left, top, right - left, bottom - top),
+                        True,
+                    )
+                )
+            except Exception:
+                pass
+
+        win32gui.EnumWindows(enum_callback, None)
+        return windows
+
+
+class FakeWindowBackend(WindowBackend):
+    """内存中的窗口列表，用于在非Windows环境下测试"""
+
+    name = "fake"
+
+    def __init__(self, windows=()):
+        self.windows = list(windows)
+        self.enum_count = 0
+
+    def set_windows(self, windows):
+        self.windows = list(windows)
+
+    def enum_windows(self):
+        self.enum_count += 1
+        return list(self.windows)
+
+
+class WindowIndex:
+    """按PID索引的窗口列表，在 ttl 秒内复用同一次枚举的结果"""
+
+    def __init__(self, backend, ttl=WINDOW_INDEX_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._by_pid = {}
+        self._windows = []
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self, max_age):
+        with self._lock:
+            now = time.monotonic()
+            if self._built_at is not None and now - self._built_at <= max_age:
+                return self._windows, self._by_pid
+            windows = self.backend.enum_windows()
+            by_pid = {}
+            for window in windows:
+                by_pid.setdefault(window.pid, []).append(window)
+            self._windows, self._by_pid = windows, by_pid
+            self._built_at = time.monotonic()
+            return windows, by_pid
+
+    def invalidate(self):
+        """丢弃缓存的索引（如窗口刚被创建或关闭）"""
+        with self._lock:
+            self._built_at = None
+
+    def windows_for_pid(self, pid, title_hint=None, max_age=None):
+        """
+        查找指定进程的可见窗口
+
+        参数:
+            pid: 进程PID
+            title_hint: 可选窗口标题关键字（不区分大小写）
+            max_age: 可接受的索引最长时间（秒），默认为 ttl
+
+        返回:
+            list: WindowInfo 列表，按Z顺序
+        """
+        _, by_pid = self._refresh(self.ttl if max_age is None else max_age)
+        hint = title_hint.lower() if title_hint else None
+        return [
+            window
+            for window in by_pid.get(pid, ())
+            if window.visible and (hint is None or hint in window.title.lower())
+        ]
+
+    def find_by_title(self, part_title=None, max_age=None):
+        """
+        按标题查找可见窗口
+
+        参数:
+            part_title: 窗口标题的一部分（不区分大小写），None表示任意可见窗口
+            max_age: 可接受的索引最长时间（秒），默认为 ttl
+
+        返回:
+            list: WindowInfo 列表，按Z顺序
+        """
+        windows, _ = self._refresh(self.ttl if max_age is None else max_age)
+        hint = part_title.lower() if part_title else None
+        return [
+            window
+            for window in windows
+            if window.visible
+            and (hint is None or (window.title and hint in window.title.lower()))
+        ]
+
+
+def create_window_backend():
+    """创建窗口枚举后端，pywin32 不可用时返回空的 FakeWindowBackend"""
+    try:
+        return Win32WindowBackend()
+    except Exception as e:
+        logger.warning(f"win32 窗口枚举不可用: {e}")
+        return FakeWindowBackend()
+
+
+_window_index = None
+_window_index_lock = threading.Lock()
+
+
+def get_window_index():
+    """获取全局窗口索引"""
+    global _window_index
+    if _window_index is None:
+        with _window_index_lock:
+            if _window_index is None:
+                _window_index = WindowIndex(create_window_backend())
+    return _window_index
+
+
+def set_window_backend(backend):
+    """替换全局窗口索引使用的后端（如测试时使用 FakeWindowBackend）"""
+    global _window_index
+    with _window_index_lock:
+        _window_index = WindowIndex(backend)
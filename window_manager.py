@@ -14,9 +14,11 @@ from config import (
     WINDOW_SIZE,
     LOG_DISPLAY_LINES,
     LOG_REFRESH_INTERVAL,
+    LOG_GUI_POLL_INTERVAL_MS,
     LOG_DIR,
 )
 from utils import show_console_window, hide_console_window
+from log_tailer import LogTailer
 
 logger = logging.getLogger()
 
@@ -25,7 +27,13 @@ class WindowManager:
     """Windows窗口管理器"""
 
     def __init__(
-        self, on_quit_callback=None, on_show_console=None, on_hide_console=None
+        self,
+        on_quit_callback=None,
+        on_show_console=None,
+        on_hide_console=None,
+        status_provider=None,
+        log_file=None,
+        log_handler=None,
     ):
         """
         初始化窗口管理器
@@ -34,10 +42,16 @@ class WindowManager:
             on_quit_callback: 退出回调函数
             on_show_console: 显示控制台回调函数
             on_hide_console: 隐藏控制台回调函数
+            status_provider: 返回各服务监控状态列表的函数（见 ServiceMonitor.status）
+            log_file: 本次运行的日志文件，未指定时显示日志目录中最新的文件
+            log_handler: 内存日志处理器（RingBufferHandler），指定时直接从内存显示日志，
+                不再读取日志文件
         """
         self.on_quit = on_quit_callback
         self.on_show_console = on_show_console
         self.on_hide_console = on_hide_console
+        self.status_provider = status_provider
+        self.service_status_label = None
         self.root = None
         self.console_visible = False
         self.log_text = None
@@ -45,6 +59,10 @@ class WindowManager:
         self.start_time = time.time()
         self._log_refresh_job = None
         self._runtime_update_job = None
+        self._status_update_job = None
+        self.log_file = log_file
+        self._log_tailer = None
+        self.log_handler = log_handler
 
     def show_console(self):
         """显示控制台窗口"""
@@ -117,52 +135,70 @@ class WindowManager:
             messagebox.showerror("错误", f"无法打开日志文件: {e}")
             logger.error(f"无法打开日志文件: {e}")
 
+    def _find_latest_log(self):
+        """返回日志目录中最新的日志文件"""
+        log_dir = os.path.abspath(LOG_DIR)
+        if not os.path.exists(log_dir):
+            return None
+
+        log_files = [
+            f
+            for f in os.listdir(log_dir)
+            if f.endswith(".log") and os.path.isfile(os.path.join(log_dir, f))
+        ]
+        if not log_files:
+            return None
+
+        # 按修改时间排序，获取最新的
+        log_files.sort(
+            key=lambda x: os.path.getmtime(os.path.join(log_dir, x)), reverse=True
+        )
+        return os.path.join(log_dir, log_files[0])
+
     def refresh_log_display(self):
-        """刷新日志显示"""
+        """刷新日志显示：只追加新产生的日志行"""
         if not self.log_text:
             return
 
         try:
-            log_dir = os.path.abspath(LOG_DIR)
-            if not os.path.exists(log_dir):
+            if self.log_handler is not None:
+                self._append_log_lines(
+                    [message + "\n" for message in self.log_handler.drain()]
+                )
                 return
 
-            # 获取最新的日志文件
-            log_files = [
-                f
-                for f in os.listdir(log_dir)
-                if f.endswith(".log") and os.path.isfile(os.path.join(log_dir, f))
-            ]
+            if self._log_tailer is None:
+                log_path = self.log_file or self._find_latest_log()
+                if not log_path:
+                    return
+                self._log_tailer = LogTailer(log_path, LOG_DISPLAY_LINES)
 
-            if not log_files:
-                return
-
-            # 按修改时间排序，获取最新的
-            log_files.sort(
-                key=lambda x: os.path.getmtime(os.path.join(log_dir, x)), reverse=True
-            )
-            latest_log = os.path.join(log_dir, log_files[0])
-
-            # 读取最后N行日志
             try:
-                with open(latest_log, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    # 只显示最后N行
-                    recent_lines = (
-                        lines[-LOG_DISPLAY_LINES:]
-                        if len(lines) > LOG_DISPLAY_LINES
-                        else lines
-                    )
-                    content = "".join(recent_lines)
-                    self.log_text.delete(1.0, tk.END)
-                    self.log_text.insert(1.0, content)
-                    # 滚动到底部
-                    self.log_text.see(tk.END)
+                lines, restarted = self._log_tailer.read_new_lines()
             except Exception as e:
                 logger.error(f"读取日志文件失败: {e}")
+                return
+            self._append_log_lines(lines, restarted)
         except Exception as e:
             logger.error(f"刷新日志显示失败: {e}")
 
+    def _append_log_lines(self, lines, restarted=False):
+        """追加日志行，restarted为True时先清空已显示的内容"""
+        if restarted:
+            self.log_text.delete(1.0, tk.END)
+        if lines:
+            self.log_text.insert(tk.END, "".join(lines))
+            self._trim_log_display()
+            # 滚动到底部
+            self.log_text.see(tk.END)
+
+    def _trim_log_display(self):
+        """只保留最后 LOG_DISPLAY_LINES 行"""
+        line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+        excess = line_count - LOG_DISPLAY_LINES
+        if excess > 0:
+            self.log_text.delete(1.0, f"{excess + 1}.0")
+
     def quit_app(self):
         """退出应用程序"""
         if messagebox.askyesno("确认", "确定要退出程序吗？"):
@@ -258,6 +294,10 @@ class WindowManager:
         )
         self.runtime_label.grid(row=0, column=1, sticky=tk.E)
 
+        # 各服务的熔断状态
+        self.service_status_label = ttk.Label(status_frame, text="")
+        self.service_status_label.grid(row=1, column=0, columnspan=2, sticky=tk.W)
+
         # 窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -265,14 +305,20 @@ class WindowManager:
         self.update_console_button()
 
         # 初始加载日志
-        self.refresh_log_display()
+        if self.log_handler is not None:
+            self._append_log_lines(
+                [message + "\n" for message in self.log_handler.attach()], True
+            )
 
-        # 定期刷新日志（每30秒）
+        # 定期刷新日志（内存日志几乎实时刷新，读取文件时每30秒）
         self.schedule_log_refresh()
 
         # 启动运行时间刷新
         self.update_runtime_label()
 
+        # 启动服务状态刷新
+        self.update_service_status()
+
     def on_closing(self):
         """窗口关闭事件处理"""
         self.quit_app()
@@ -282,8 +328,13 @@ class WindowManager:
         self.refresh_log_display()
         # 定期刷新
         if self.root and self.root.winfo_exists():
+            interval_ms = (
+                LOG_GUI_POLL_INTERVAL_MS
+                if self.log_handler is not None
+                else LOG_REFRESH_INTERVAL * 1000
+            )
             self._log_refresh_job = self.root.after(
-                LOG_REFRESH_INTERVAL * 1000, self.schedule_log_refresh
+                interval_ms, self.schedule_log_refresh
             )
 
     def show_window(self):
@@ -340,16 +391,43 @@ class WindowManager:
         )
 
         if self.root:
-            self._runtime_update_job = self.root.after(
-                1000, self.update_runtime_label
-            )
+            self._runtime_update_job = self.root.after(1000, self.update_runtime_label)
+
+    def update_service_status(self):
+        """更新服务状态显示（熔断状态与连续失败次数）"""
+        if not self.service_status_label or not self.status_provider:
+            return
+
+        parts = []
+        try:
+            for status in self.status_provider():
+                state = status["state"]
+                if state == "open":
+                    text = f"已熔断，{status['retry_in']:.0f}秒后重试"
+                elif state == "half_open":
+                    text = "试探恢复中"
+                elif status["consecutive_failures"]:
+                    text = f"连续失败{status['consecutive_failures']}次"
+                else:
+                    text = "正常"
+                parts.append(f"{status['name']}: {text}")
+        except Exception as e:
+            logger.error(f"获取服务状态失败: {e}")
+        self.service_status_label.config(text="  |  ".join(parts))
+
+        if self.root:
+            self._status_update_job = self.root.after(1000, self.update_service_status)
 
     def _cancel_scheduled_tasks(self):
         """取消所有已安排的 after 任务"""
         if not self.root:
             return
 
-        for job_attr in ("_log_refresh_job", "_runtime_update_job"):
+        for job_attr in (
+            "_log_refresh_job",
+            "_runtime_update_job",
+            "_status_update_job",
+        ):
             job_id = getattr(self, job_attr, None)
             if job_id:
                 try: